@@ -0,0 +1,170 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections, transaction
+from django.urls import Resolver404, resolve
+from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_424_FAILED_DEPENDENCY, \
+    HTTP_503_SERVICE_UNAVAILABLE
+from rest_framework.utils.encoders import JSONEncoder
+
+from batch.serializers import REFERENCE_KEY
+from config.settings import BATCH
+from util.admission import admission_controller
+from util.views import qualified_view_name
+
+
+class OperationResult:
+    def __init__(self, status: int, body=None, cookies=None):
+        self.status = status
+        self.body = body
+        self.cookies = cookies
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def as_dict(self) -> dict:
+        return {"status": self.status, "body": self.body}
+
+
+class BatchExecutor:
+    """
+    Executes the operations of a batch against the project's URL configuration without going through HTTP again.
+    Every operation is run as the user that authenticated the batch request, so authentication happens only once.
+    Consecutive reads that do not reference other operations are executed concurrently, everything else in order.
+    As operations bypass the middleware, each one is admitted by the cost class of its view.
+    """
+
+    def __init__(self, meta: dict, user, auth, operations: list[dict], atomic: bool):
+        self.meta = meta
+        self.user = user
+        self.auth = auth
+        self.operations = operations
+        self.atomic = atomic
+        self.results = [None] * len(operations)  # type: list[Optional[OperationResult]]
+
+    def run(self) -> list[OperationResult]:
+        if self.atomic:
+            # A single transaction is bound to a single connection, so no operation can be run concurrently
+            with transaction.atomic():
+                for index in range(len(self.operations)):
+                    self.results[index] = self.execute(index)
+
+                    if not self.results[index].ok:
+                        transaction.set_rollback(True)
+                        break
+
+            return [r or OperationResult(HTTP_424_FAILED_DEPENDENCY) for r in self.results]
+
+        for group in self.groups():
+            if len(group) == 1:
+                self.results[group[0]] = self.execute(group[0])
+                continue
+
+            with ThreadPoolExecutor(max_workers=min(len(group), BATCH["MAX_WORKERS"])) as pool:
+                for index, result in zip(group, pool.map(self.execute_in_thread, group)):
+                    self.results[index] = result
+
+        return self.results
+
+    def groups(self) -> list[list[int]]:
+        groups = []
+        previous_concurrent = False
+
+        for index, operation in enumerate(self.operations):
+            concurrent = operation["method"] == "GET" and not operation["dependencies"]
+
+            if concurrent and previous_concurrent:
+                groups[-1].append(index)
+            else:
+                groups.append([index])
+
+            previous_concurrent = concurrent
+
+        return groups
+
+    def execute_in_thread(self, index: int) -> OperationResult:
+        try:
+            return self.execute(index)
+        finally:
+            # Worker threads open their own database connections, which would otherwise never be closed
+            connections.close_all()
+
+    def execute(self, index: int) -> OperationResult:
+        operation = self.operations[index]
+
+        if any(not self.results[d].ok for d in operation["dependencies"]):
+            return OperationResult(HTTP_424_FAILED_DEPENDENCY)
+
+        # Referenced keys may not exist, or not be numbers where they index a list
+        try:
+            body = self.substitute(operation["body"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return OperationResult(HTTP_400_BAD_REQUEST, {"detail": "Reference could not be resolved"})
+
+        path, _, query_string = operation["path"].partition("?")
+
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return OperationResult(HTTP_404_NOT_FOUND, {"detail": "Not found."})
+
+        if getattr(match.func, "batch_exempt", False):
+            return OperationResult(HTTP_400_BAD_REQUEST, {"detail": "Operation not allowed in batch"})
+
+        cost_class = admission_controller.cost_class(qualified_view_name(match.func))
+
+        if not cost_class.acquire():
+            return OperationResult(HTTP_503_SERVICE_UNAVAILABLE, {"detail": "Server overloaded"})
+
+        try:
+            request = self.build_request(operation["method"], path, query_string, body)
+            response = match.func(request, *match.args, **match.kwargs)
+
+            if hasattr(response, "render"):
+                response.render()
+        finally:
+            cost_class.release()
+
+        return OperationResult(response.status_code, getattr(response, "data", None), response.cookies)
+
+    def substitute(self, value):
+        if isinstance(value, dict):
+            if set(value) == {REFERENCE_KEY} and isinstance(value[REFERENCE_KEY], str):
+                index, *keys = value[REFERENCE_KEY].split("/")
+                result = self.results[int(index)].body
+
+                for key in keys:
+                    result = result[int(key) if isinstance(result, list) else key]
+
+                return result
+
+            return {k: self.substitute(v) for k, v in value.items()}
+
+        if isinstance(value, list):
+            return [self.substitute(v) for v in value]
+
+        return value
+
+    def build_request(self, method: str, path: str, query_string: str, body) -> WSGIRequest:
+        content = json.dumps(body, cls=JSONEncoder).encode() if body is not None else b""
+        environ = {
+            **self.meta,
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query_string,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(content)),
+            "wsgi.input": io.BytesIO(content),
+        }
+
+        request = WSGIRequest(environ)
+
+        if self.user.is_authenticated:
+            request._force_auth_user = self.user
+            request._force_auth_token = self.auth
+
+        return request
@@ -0,0 +1,53 @@
+from rest_framework import serializers
+
+from config.settings import BATCH
+
+REFERENCE_KEY = "$ref"
+
+
+def find_references(value) -> list[list[str]]:
+    """
+    Return all references contained in an operation body. A reference is an object of the form
+    `{"$ref": "<index>/<key>/..."}` and is replaced by the value at that path of an earlier operation's response body.
+    """
+    if isinstance(value, dict):
+        if set(value) == {REFERENCE_KEY} and isinstance(value[REFERENCE_KEY], str):
+            return [value[REFERENCE_KEY].split("/")]
+
+        return [r for v in value.values() for r in find_references(v)]
+
+    if isinstance(value, list):
+        return [r for v in value for r in find_references(v)]
+
+    return []
+
+
+class OperationSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    path = serializers.RegexField(regex=r"^/")
+    body = serializers.JSONField(required=False, default=None)
+
+
+class BatchSerializer(serializers.Serializer):
+    operations = serializers.ListField(child=OperationSerializer(), min_length=1,
+                                       max_length=BATCH["MAX_OPERATIONS"])
+    atomic = serializers.BooleanField(default=False)
+
+    @staticmethod
+    def validate_operations(value):
+        for index, operation in enumerate(value):
+            dependencies = set()
+
+            for reference in find_references(operation["body"]):
+                if not reference[0].isdigit() or int(reference[0]) >= index:
+                    raise serializers.ValidationError(
+                        f"Operation {index} may only reference earlier operations by their index")
+
+                if not all(reference[1:]):
+                    raise serializers.ValidationError(f"Operation {index} contains a reference with an empty key")
+
+                dependencies.add(int(reference[0]))
+
+            operation["dependencies"] = dependencies
+
+        return value
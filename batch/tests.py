@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import User
+from verification.models import Verification
+
+TOKEN = 123456
+
+
+class BatchExecutorTests(TestCase):
+    def setUp(self):
+        # Every operation is throttled, and the throttle history is kept in the cache
+        cache.clear()
+        self.client = APIClient()
+        User.objects.create_user(username="alice", email="alice@example.com", password="password")
+
+    def batch(self, *operations, atomic=False) -> list[dict]:
+        response = self.client.post("/batch", {"operations": operations, "atomic": atomic}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["results"]
+
+    @staticmethod
+    def request_verification() -> dict:
+        return {"method": "POST", "path": "/verification/request", "body": {"email": "bob@example.com"}}
+
+    @staticmethod
+    def confirm_verification(verification, token: int = TOKEN) -> dict:
+        return {"method": "POST", "path": "/verification/confirm",
+                "body": {"verification": verification, "token": token}}
+
+    @staticmethod
+    def login(password: str) -> dict:
+        return {"method": "POST", "path": "/users/login", "body": {"username": "alice", "password": password}}
+
+    @mock.patch("verification.models.random.randint", return_value=TOKEN)
+    def test_reference_is_replaced_by_earlier_response(self, _):
+        results = self.batch(self.request_verification(), self.confirm_verification({"$ref": "0/verification"}))
+
+        self.assertEqual([result["status"] for result in results], [200, 200])
+        self.assertEqual(str(Verification.objects.get().secret), results[1]["body"]["secret"])
+
+    def test_unresolvable_reference_fails_operation(self):
+        results = self.batch(self.request_verification(), self.confirm_verification({"$ref": "0/missing"}))
+
+        self.assertEqual([result["status"] for result in results], [200, 400])
+
+    def test_non_numeric_key_into_list_fails_operation(self):
+        self.client.force_authenticate(User.objects.create_superuser(username="admin", email="admin@example.com"))
+        results = self.batch({"method": "GET", "path": "/users/changes"},
+                             self.confirm_verification({"$ref": "0/changes/x"}))
+
+        self.assertEqual([result["status"] for result in results], [200, 400])
+
+    def test_reference_to_later_operation_is_rejected(self):
+        response = self.client.post("/batch", {"operations": [self.confirm_verification({"$ref": "0/verification"})]},
+                                    format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_reference_with_empty_key_is_rejected(self):
+        operations = [self.request_verification(), self.confirm_verification({"$ref": "0//verification"})]
+        response = self.client.post("/batch", {"operations": operations}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_operation_referencing_failed_operation_is_not_executed(self):
+        results = self.batch(self.login("wrong"), self.confirm_verification({"$ref": "0/code"}), self.login("password"))
+
+        self.assertEqual([result["status"] for result in results], [403, 424, 200])
+
+    @mock.patch("verification.models.random.randint", return_value=TOKEN)
+    def test_atomic_batch_rolls_back_on_failure(self, _):
+        wrong_token = self.confirm_verification({"$ref": "0/verification"}, TOKEN + 1)
+        results = self.batch(self.request_verification(), wrong_token, self.login("password"), atomic=True)
+
+        self.assertEqual([result["status"] for result in results], [200, 403, 424])
+        self.assertFalse(Verification.objects.exists())
+
+    @mock.patch("verification.models.random.randint", return_value=TOKEN)
+    def test_non_atomic_batch_keeps_earlier_operations(self, _):
+        wrong_token = self.confirm_verification({"$ref": "0/verification"}, TOKEN + 1)
+        results = self.batch(self.request_verification(), wrong_token)
+
+        self.assertEqual([result["status"] for result in results], [200, 403])
+        self.assertTrue(Verification.objects.exists())
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from batch import views
+
+urlpatterns = [
+    path("", views.batch),
+]
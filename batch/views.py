@@ -0,0 +1,30 @@
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from batch.executor import BatchExecutor
+from batch.serializers import BatchSerializer
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+@throttle_classes([])
+def batch(request):
+    # Throttling is applied to every single operation instead
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    executor = BatchExecutor(request.META, request.user, request.auth, **serializer.validated_data)
+    results = executor.run()
+
+    response = Response({"results": [result.as_dict() for result in results]})
+
+    # Cookies set by operations (e.g. login or logout) are passed on in order
+    for result in results:
+        if result.cookies:
+            response.cookies.update(result.cookies)
+
+    return response
+
+
+batch.batch_exempt = True
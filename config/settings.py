@@ -46,18 +46,27 @@ INSTALLED_APPS = [
     "django_countries",
 
     # Project Apps
+    "util",
     "users",
     "verification",
+    "monitoring",
+    "batch",
 ]
 
 MIDDLEWARE = [
+    "monitoring.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "util.replicas.ReplicaRoutingMiddleware",
+    "util.validation.RequestValidationMiddleware",
+    "util.idempotency.IdempotencyMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "util.admission.AdmissionControlMiddleware",
+    "monitoring.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -90,8 +99,8 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.UserRateThrottle",
-        "rest_framework.throttling.AnonRateThrottle",
+        "util.throttling.UserRateThrottle",
+        "util.throttling.AnonRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "user": "100/minute",
@@ -100,6 +109,33 @@ REST_FRAMEWORK = {
 }
 
 
+# User change feed
+
+USER_CHANGES = {
+    "MAX_BATCH": 100,
+    # Maximum time a long-polling request waits for new changes
+    "MAX_WAIT_SECONDS": 30,
+    # Lifetime of an event stream connection, after which clients reconnect with their last cursor
+    "STREAM_SECONDS": 300,
+    "KEEP_ALIVE_SECONDS": 15,
+    # Interval in which waiting consumers check the database for changes committed by other processes
+    "POLL_SECONDS": 1,
+    # Time for which changes following a gap in the IDs wait for the transactions holding the missing IDs to commit
+    "SETTLE_SECONDS": 5,
+    # Changes older than this are compacted to the latest change per user and field
+    "COMPACT_AFTER_DAYS": 7,
+}
+
+
+# Batch requests
+
+BATCH = {
+    "MAX_OPERATIONS": 20,
+    # Maximum number of threads executing independent read operations concurrently
+    "MAX_WORKERS": 4,
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
@@ -110,6 +146,67 @@ DATABASES = {
     }
 }
 
+# Read replicas
+# Every alias listed in REPLICAS must be configured in DATABASES. For local testing, a copy of the primary SQLite
+# file can serve as replica:
+#     DATABASES["replica"] = {
+#         "ENGINE": "django.db.backends.sqlite3",
+#         "NAME": BASE_DIR / "db.replica.sqlite3",
+#         "TEST": {"MIRROR": "default"},
+#     }
+
+DATABASE_ROUTERS = ["util.sharding.ShardRouter", "util.replicas.ReplicaRouter"]
+
+REPLICA_ROUTING = {
+    "REPLICAS": [],
+    # Period after a write in which the client reads from the primary only
+    "STICKY_SECONDS": 5,
+    "STICKY_COOKIE": "primary_until",
+    # Period for which the health of a replica is cached
+    "HEALTH_CHECK_SECONDS": 10,
+}
+
+# User sharding
+# Users and their tokens are distributed across the listed database aliases by consistent hashing of the user ID. All
+# other tables, including the user directory used for lookups and uniqueness checks, stay on the default database.
+# Sharding is disabled while SHARDS is empty. After changing SHARDS, migrate every shard and run
+# `python manage.py rebalance_shards`. For local testing, each shard can be a separate SQLite file:
+#     DATABASES["shard_0"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "db.shard_0.sqlite3"}
+
+SHARDING = {
+    "SHARDS": [],
+    # Number of points per shard on the hash ring
+    "VIRTUAL_NODES": 64,
+}
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/4.2/topics/auth/passwords/
+
+PASSWORD_HASHERS = [
+    "util.hashers.PBKDF2PasswordHasher",
+    "util.hashers.PBKDF2SHA1PasswordHasher",
+    "util.hashers.Argon2PasswordHasher",
+    "util.hashers.BCryptSHA256PasswordHasher",
+    "util.hashers.ScryptPasswordHasher",
+]
+
+# Work factors of the hashers are calibrated on the serving host by `manage.py calibrate_password_hashers --write`,
+# which the image runs at container start and which stores them in CALIBRATION_FILE. Without it, Django's defaults are
+# used.
+PASSWORD_HASHING = {
+    # Time a single hash should take, which bounds the CPU time of every login and signup
+    "TARGET_SECONDS": 0.25,
+    "CALIBRATION_FILE": BASE_DIR / "password_hashers.json",
+    # Warn at start-up if hashing takes less than half or more than twice TARGET_SECONDS
+    "CHECK_ON_STARTUP": True,
+    # Maximum number of outdated hashes waiting to be updated after a login
+    "MAX_PENDING_REHASHES": 100,
+    # Hashes are only updated if their work factor makes them cheaper than this fraction of the calibrated one, as
+    # repeated calibrations vary by some percent
+    "REHASH_BELOW": 0.75,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -133,6 +230,116 @@ AUTH_USER_MODEL = "users.User"
 AUTH_COOKIE_KEY = "auth_token"
 
 
+# Request validation
+# JSON request bodies are validated against the schemas of SCHEMA before they reach any view. The system checks fail if
+# the schema of an operation listed in SERIALIZERS drifts apart from the serializer validating the same body.
+
+REQUEST_VALIDATION = {
+    "SCHEMA": BASE_DIR / "docs" / "openapi.yml",
+    "SERIALIZERS": {
+        "POST /users/login": "users.serializers.LoginSerializer",
+        "POST /users/change-password": "users.serializers.ChangePasswordSerializer",
+        "POST /users/change-email-address": "users.serializers.ChangeEmailAddressSerializer",
+        "POST /users/change-phone-number": "users.serializers.ChangePhoneNumberSerializer",
+        "POST /users/signup": "users.serializers.SignupSerializer",
+        "POST /users/reset-password": "users.serializers.ResetPasswordSerializer",
+        "PATCH /users/me": "users.serializers.PrivateUserSerializer",
+        "POST /verification/request": "verification.serializers.VerificationRequestSerializer",
+        "POST /verification/confirm": "verification.serializers.VerificationConfirmSerializer",
+        "POST /batch": "batch.serializers.BatchSerializer",
+        "POST /monitoring/profiling/start": "monitoring.serializers.ProfilingStartSerializer",
+    },
+}
+
+
+# Idempotency keys
+# Responses to POST requests with an `Idempotency-Key` header are stored in CACHE. The default local-memory cache is
+# per process, a shared cache (e.g. Redis or Memcached) is required to deduplicate retries across processes.
+
+IDEMPOTENCY = {
+    "HEADER": "Idempotency-Key",
+    "CACHE": "default",
+    "TTL_SECONDS": 24 * 60 * 60,
+    # Upper bound for the execution of the original request, after which its key may be executed again
+    "LOCK_SECONDS": 60,
+    # Time a duplicate waits for the original request to finish, and the interval it checks the cache in
+    "WAIT_SECONDS": 10,
+    "POLL_SECONDS": 0.05,
+}
+
+
+# Admission control
+# Every view belongs to a cost class (DEFAULT_CLASS unless listed in VIEWS). Each class executes at most CONCURRENCY
+# requests at once, queues at most MAX_QUEUE further requests for at most QUEUE_TIMEOUT_SECONDS and responds with 503
+# to all others. The limits are per process. Metrics are served by `monitoring/admission`.
+
+ADMISSION_CONTROL = {
+    "CLASSES": {
+        # Views hashing passwords
+        "expensive": {"CONCURRENCY": 4, "MAX_QUEUE": 8, "QUEUE_TIMEOUT_SECONDS": 2},
+        "default": {"CONCURRENCY": 32, "MAX_QUEUE": 64, "QUEUE_TIMEOUT_SECONDS": 1},
+        # Long polls, which mostly wait for changes and would otherwise hold slots of the default class
+        "long_poll": {"CONCURRENCY": 64, "MAX_QUEUE": 0, "QUEUE_TIMEOUT_SECONDS": 0},
+    },
+    "DEFAULT_CLASS": "default",
+    "VIEWS": {
+        "users.views.login": "expensive",
+        "users.views.signup": "expensive",
+        "users.views.change_password": "expensive",
+        "users.views.reset_password": "expensive",
+        "users.views.user_changes": "long_poll",
+    },
+    "RETRY_AFTER_SECONDS": 1,
+}
+
+
+# Metrics
+# Served in the Prometheus text format by `/metrics` to clients from ALLOWED_NETWORKS. With several worker processes,
+# MULTIPROCESS_DIR must be set to a directory shared by all of them and emptied before the server starts.
+
+METRICS = {
+    "MULTIPROCESS_DIR": None,
+    # Interval in which every process folds the metrics of ended threads and writes its metrics to MULTIPROCESS_DIR
+    "FLUSH_SECONDS": 5,
+    "ALLOWED_NETWORKS": ["127.0.0.0/8", "::1/128", "10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"],
+}
+
+
+# Activity rollups
+# Activity and signups are aggregated into hourly and daily buckets served by `monitoring/activity`. Each process
+# merges its events into the database every FLUSH_SECONDS, so the most recent events may be missing from the stats.
+
+ACTIVITY_ROLLUPS = {
+    "FLUSH_SECONDS": 60,
+    # Hourly buckets are deleted by `manage.py prune_activity_rollups` after this many days, daily ones are kept
+    "HOURLY_RETENTION_DAYS": 7,
+    # Maximum number of buckets returned per request
+    "MAX_BUCKETS": 24 * 31,
+}
+
+
+# Health checks
+# Both probes are answered by `monitoring.health.HealthCheckApplication` before any middleware runs
+
+HEALTH_CHECK = {
+    "LIVENESS_PATH": "/health/live",
+    "READINESS_PATH": "/health/ready",
+    # Database connectivity and pending migrations are checked at most once per period
+    "CACHE_SECONDS": 5,
+    # Number of concurrent requests above which the process reports not to be ready. Waiting long polls do not count.
+    "MAX_IN_FLIGHT": 32,
+}
+
+
+# Profiling
+# Captures are started and stopped through the staff-only `monitoring/profiling` endpoints
+
+PROFILING = {
+    "HEADER": "X-Profile",
+    "OUTPUT_DIR": BASE_DIR / "profiles",
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
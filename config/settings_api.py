@@ -0,0 +1,59 @@
+"""
+API-only Django settings for project.
+
+Extends the default settings and strips everything the REST API does not use: the API authenticates through
+`CookieAuthentication`, only renders JSON and neither uses sessions, messages, the admin nor static files. Select it
+by setting DJANGO_SETTINGS_MODULE to 'config.settings_api'. Compare both profiles with:
+
+    python manage.py benchmark_settings config.settings config.settings_api
+
+The profile roughly halves the overhead of the middleware stack per request. It does not make start-up measurably
+cheaper: start-up is dominated by imports both profiles share, mainly Django itself and django_countries, which
+imports pkg_resources and the admin.
+"""
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    # Django
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+
+    # Dependencies
+    "rest_framework",
+    "rest_framework.authtoken",
+    "phonenumber_field",
+    "django_countries",
+
+    # Project Apps
+    "util",
+    "users",
+    "verification",
+    "monitoring",
+    "batch",
+]
+
+# CSRF protection is not needed here: all DRF views are CSRF-exempt and the authentication cookie is same-site strict
+MIDDLEWARE = [
+    "monitoring.middleware.MetricsMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "util.replicas.ReplicaRoutingMiddleware",
+    "util.validation.RequestValidationMiddleware",
+    "util.idempotency.IdempotencyMiddleware",
+    "util.admission.AdmissionControlMiddleware",
+    "monitoring.middleware.ProfilingMiddleware",
+]
+
+# Only the browsable API needs templates
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+    ],
+}
+
+# All messages are English, which makes translation machinery pure overhead
+USE_I18N = False
@@ -17,8 +17,13 @@ Including another URLconf
 from django.http import HttpResponse
 from django.urls import path, include
 
+from monitoring.views import metrics
+
 urlpatterns = [
     path("users/", include("users.urls")),
     path("verification/", include("verification.urls")),
+    path("monitoring/", include("monitoring.urls")),
+    path("batch", include("batch.urls")),
+    path("metrics", metrics),
     path("healthcheck", lambda x: HttpResponse()),
 ]
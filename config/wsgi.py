@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Imported after the application has been set up, as it requires configured settings
+from monitoring.health import HealthCheckApplication  # noqa: E402
+
+application = HealthCheckApplication(application)
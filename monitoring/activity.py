@@ -0,0 +1,165 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from config.settings import ACTIVITY_ROLLUPS
+from monitoring.models import ActivityRollup
+from util.hyperloglog import HyperLogLog
+
+Event = ActivityRollup.Event
+Granularity = ActivityRollup.Granularity
+
+logger = logging.getLogger(__name__)
+
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == Granularity.DAY else moment
+
+
+class ActivityRecorder:
+    """
+    Aggregates activity and signup events into hourly and daily rollups. Events are aggregated in memory and merged
+    into the database every `FLUSH_SECONDS`, so recording an event costs no query. As counts are added and sketches
+    merged, concurrent flushes of several processes yield the same rollups as a single one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        # Database the pending events were recorded against, which test runs swap for a test database
+        self._database = None
+
+    def record(self, event: str, user_id, moment: datetime = None):
+        moment = moment or timezone.now()
+
+        with self._lock:
+            for granularity in Granularity:
+                key = (event, granularity.value, truncate(moment, granularity))
+                entry = self._pending.setdefault(key, [0, HyperLogLog()])
+                entry[0] += 1
+                entry[1].add(user_id.bytes)
+
+            self._database = connection.settings_dict["NAME"]
+            due = time.monotonic() - self._last_flush >= ACTIVITY_ROLLUPS["FLUSH_SECONDS"]
+
+        # A flush within a transaction of the caller would be lost if the caller rolled back
+        if due and not connection.in_atomic_block:
+            # The events are kept for the next flush, so a failing merge must not fail the request recording them
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception("Merging activity rollups failed")
+
+    def record_on_commit(self, event: str, user_id):
+        transaction.on_commit(lambda: self.record(event, user_id))
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+
+        keys = sorted(pending)
+
+        for index, key in enumerate(keys):
+            try:
+                self.merge(*key, *pending[key])
+            except Exception:
+                # Keep the events of this and all following buckets for the next flush, earlier ones are committed
+                with self._lock:
+                    for unmerged in keys[index:]:
+                        count, sketch = pending[unmerged]
+                        entry = self._pending.setdefault(unmerged, [0, HyperLogLog()])
+                        entry[0] += count
+                        entry[1].merge(sketch)
+                raise
+
+    @staticmethod
+    def merge(event: str, granularity: str, bucket: datetime, count: int, sketch: HyperLogLog):
+        with transaction.atomic():
+            rollup, created = ActivityRollup.objects.select_for_update().get_or_create(
+                event=event, granularity=granularity, bucket=bucket,
+                defaults={"count": count, "sketch": bytes(sketch)},
+            )
+
+            if not created:
+                sketch.merge(HyperLogLog(rollup.sketch))
+                rollup.count += count
+                rollup.sketch = bytes(sketch)
+                rollup.save(update_fields=["count", "sketch"])
+
+    def summarize(self, event: str, granularity: str, start: datetime, end: datetime) -> tuple[int, int]:
+        """
+        Return the number of events and the estimated number of distinct users of all buckets from the bucket of
+        `start` up to and including the bucket of `end`.
+        """
+        rollups = ActivityRollup.objects.filter(
+            event=event, granularity=granularity, bucket__gte=truncate(start, granularity),
+            bucket__lte=truncate(end, granularity),
+        ).values_list("count", "sketch")
+
+        total, sketch = 0, HyperLogLog()
+
+        for count, registers in rollups:
+            total += count
+            sketch.merge(HyperLogLog(registers))
+
+        return total, sketch.count()
+
+    def series(self, granularity: str, start: datetime, end: datetime) -> list[dict]:
+        rollups = ActivityRollup.objects.filter(
+            granularity=granularity, bucket__gte=truncate(start, granularity), bucket__lte=truncate(end, granularity),
+        ).values_list("event", "bucket", "count", "sketch")
+
+        by_bucket = {}
+
+        for event, bucket, count, registers in rollups:
+            entry = by_bucket.setdefault(bucket, {"bucket": bucket, "requests": 0, "active_users": 0, "signups": 0})
+
+            if event == Event.ACTIVE:
+                entry["requests"] = count
+                entry["active_users"] = HyperLogLog(registers).count()
+            else:
+                entry["signups"] = count
+
+        return [by_bucket[bucket] for bucket in sorted(by_bucket)]
+
+    def stats(self, now: datetime = None) -> dict:
+        """
+        Return the distinct active users and signups of the last 24 hours, 7 days and 30 days. The day is made up of
+        hourly buckets, weeks and months of daily buckets, the current bucket included.
+        """
+        now = now or timezone.now()
+        windows = {
+            "day": (Granularity.HOUR, now - timedelta(hours=23)),
+            "week": (Granularity.DAY, now - timedelta(days=6)),
+            "month": (Granularity.DAY, now - timedelta(days=29)),
+        }
+        stats = {"active_users": {}, "signups": {}}
+
+        for name, (granularity, start) in windows.items():
+            stats["active_users"][name] = self.summarize(Event.ACTIVE, granularity, start, now)[1]
+            stats["signups"][name] = self.summarize(Event.SIGNUP, granularity, start, now)[0]
+
+        return stats
+
+
+def flush_at_exit():
+    # After a test run, the events were recorded against the test database, which has been destroyed by now
+    if activity_recorder._database != connection.settings_dict["NAME"]:
+        return
+
+    try:
+        activity_recorder.flush()
+    except DatabaseError:
+        logger.exception("Merging activity rollups at exit failed")
+
+
+activity_recorder = ActivityRecorder()
+atexit.register(flush_at_exit)
@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+class Readiness:
+    """
+    Readiness state of the serving process. The database checks are cached for `CACHE_SECONDS` and only ever run in
+    one thread at a time, so that probes never pile load onto the database.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self._checks = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def idle(self):
+        """
+        Leave the requests in flight while the current request waits without using any resources, such as a long
+        poll, so that waiting clients do not mark the process as saturated.
+        """
+        self.leave()
+
+        try:
+            yield
+        finally:
+            self.enter()
+
+    def database_checks(self) -> dict:
+        expired = time.monotonic() - self._checked_at > settings.HEALTH_CHECK["CACHE_SECONDS"]
+
+        # While another thread refreshes the checks, the previous result is served
+        if (expired or self._checks is None) and self._check_lock.acquire(blocking=self._checks is None):
+            try:
+                self._checks = self.run_database_checks()
+                self._checked_at = time.monotonic()
+            finally:
+                self._check_lock.release()
+
+        return self._checks
+
+    @staticmethod
+    def run_database_checks() -> dict:
+        connection = connections[DEFAULT_DB_ALIAS]
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+            executor = MigrationExecutor(connection)
+            pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        except DatabaseError:
+            return {"database": False, "migrations": False}
+        finally:
+            connection.close()
+
+        return {"database": True, "migrations": not pending}
+
+    def state(self) -> tuple[bool, dict]:
+        checks = self.database_checks()
+        saturated = self.in_flight >= settings.HEALTH_CHECK["MAX_IN_FLIGHT"]
+        ready = checks["database"] and checks["migrations"] and not saturated
+        return ready, {**checks, "in_flight": self.in_flight, "saturated": saturated}
+
+
+readiness = Readiness()
+
+
+class HealthCheckApplication:
+    """
+    WSGI wrapper answering the liveness and readiness probes before any middleware or URL resolution runs. All other
+    requests are passed to the wrapped application and counted as in flight.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.liveness_path = settings.HEALTH_CHECK["LIVENESS_PATH"]
+        self.readiness_path = settings.HEALTH_CHECK["READINESS_PATH"]
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO")
+
+        if path == self.liveness_path:
+            return self.respond(start_response, True, {})
+
+        if path == self.readiness_path:
+            return self.respond(start_response, *readiness.state())
+
+        readiness.enter()
+
+        try:
+            return self.application(environ, start_response)
+        finally:
+            readiness.leave()
+
+    @staticmethod
+    def respond(start_response, healthy: bool, body: dict):
+        content = json.dumps({"healthy": healthy, **body}).encode()
+        status = "200 OK" if healthy else "503 Service Unavailable"
+        start_response(status, [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(content))),
+            ("Cache-Control", "no-store"),
+        ])
+        return [content]
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from monitoring.activity import ActivityRecorder, Event
+from monitoring.models import ActivityRollup
+from users.models import User
+from util.sharding import sharding_enabled
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the signup rollups from the join dates of all users, replacing the existing ones. Activity rollups "
+        "cannot be rebuilt, as only the last activity of each user is known."
+    )
+
+    def handle(self, *args, **options):
+        databases = settings.SHARDING["SHARDS"] if sharding_enabled() else [DEFAULT_DB_ALIAS]
+        recorder = ActivityRecorder()
+        users = 0
+
+        # Recording within the transaction defers all writes to the final flush
+        with transaction.atomic():
+            ActivityRollup.objects.filter(event=Event.SIGNUP).delete()
+
+            for database in databases:
+                for user_id, date_joined in User.objects.using(database).values_list("id", "date_joined").iterator():
+                    recorder.record(Event.SIGNUP, user_id, date_joined)
+                    users += 1
+
+            recorder.flush()
+
+        self.stdout.write(self.style.SUCCESS(f"Recorded the signups of {users} user(s)"))
@@ -0,0 +1,73 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter per settings module so that start-up cost is measured from a cold process. Loads the
+# application the image serves, including the health check wrapper.
+WORKER = """
+import json, sys, time
+start = time.perf_counter()
+from config.wsgi import application
+startup = time.perf_counter() - start
+
+from wsgiref.util import setup_testing_defaults
+
+def call(path, method):
+    environ = {"PATH_INFO": path, "REQUEST_METHOD": method, "HTTP_HOST": "localhost", "REMOTE_ADDR": "127.0.0.1"}
+    setup_testing_defaults(environ)
+    b"".join(application(environ, lambda status, headers: None))
+
+results = {"startup": startup}
+for path, method in json.loads(sys.argv[1]):
+    for _ in range(50):
+        call(path, method)
+    start = time.perf_counter()
+    for _ in range(int(sys.argv[2])):
+        call(path, method)
+    results[f"{method} {path}"] = (time.perf_counter() - start) / int(sys.argv[2])
+print(json.dumps(results))
+"""
+
+# Neither request touches the database: the first only passes the middleware stack, the second is rejected by
+# DRF's permission check after (empty) authentication
+REQUESTS = [
+    ("/healthcheck", "GET"),
+    ("/users/logout", "POST"),
+]
+
+
+class Command(BaseCommand):
+    help = "Compare start-up time and per-request overhead of different settings modules"
+
+    def add_arguments(self, parser):
+        parser.add_argument("modules", nargs="*", default=["config.settings", "config.settings_api"])
+        parser.add_argument("--runs", type=int, default=5, help="Number of cold starts per settings module")
+        parser.add_argument("--requests", type=int, default=2000, help="Number of requests per endpoint and run")
+
+    def handle(self, *args, **options):
+        # Otherwise the first module measured pays for compiling bytecode and filling the file system cache
+        for module in options["modules"]:
+            self.run_worker(module, 1)
+
+        for module in options["modules"]:
+            runs = [self.run_worker(module, options["requests"]) for _ in range(options["runs"])]
+            self.stdout.write(self.style.MIGRATE_HEADING(module))
+
+            for key in runs[0]:
+                median = statistics.median(run[key] for run in runs)
+                unit, factor = ("ms", 1e3) if key == "startup" else ("us", 1e6)
+                self.stdout.write(f"  {key:<24} {median * factor:10.1f} {unit}")
+
+    @staticmethod
+    def run_worker(module: str, requests: int) -> dict:
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": module}
+        output = subprocess.run(
+            [sys.executable, "-c", WORKER, json.dumps(REQUESTS), str(requests)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        return json.loads(output.stdout)
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from config.settings import ACTIVITY_ROLLUPS
+from monitoring.models import ActivityRollup
+
+
+class Command(BaseCommand):
+    help = "Delete hourly activity rollups past their retention. Daily rollups are kept."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ACTIVITY_ROLLUPS["HOURLY_RETENTION_DAYS"],
+                            help="Only delete hourly rollups older than this many days")
+
+    def handle(self, *args, **options):
+        oldest_kept = timezone.now() - timedelta(days=options["days"])
+        deleted, _ = ActivityRollup.objects.filter(
+            granularity=ActivityRollup.Granularity.HOUR, bucket__lt=oldest_kept
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} hourly rollup(s)"))
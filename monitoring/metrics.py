@@ -0,0 +1,283 @@
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def merge(target: dict, source: dict):
+    for key, value in source.items():
+        if isinstance(value, list):
+            current = target.setdefault(key, [0] * len(value))
+            target[key] = [a + b for a, b in zip(current, value)]
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """
+    Collects metrics without locking on the hot path: every thread records into a dictionary only it writes to, and
+    the dictionaries of all threads are summed up when the metrics are exposed. Values of threads that have ended are
+    folded into a single dictionary by a background thread every `FLUSH_SECONDS` and on every collection, so servers
+    starting a thread per request do not accumulate dictionaries even if the metrics are never scraped.
+
+    Forked worker processes start with empty values. If `MULTIPROCESS_DIR` is set, every process writes a snapshot of
+    its values to that directory every `FLUSH_SECONDS` and on exit, and the exposition includes the snapshots of all
+    other processes. The directory must be emptied before the server starts.
+    """
+
+    def __init__(self):
+        self.metrics = {}  # type: dict[str, Metric]
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self.write_snapshot)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._threads = []
+        self._retired = {}
+        self._maintainer = None  # type: Optional[threading.Thread]
+        self._process_id = f"{os.getpid()}-{time.time_ns()}"
+
+    def register(self, metric: "Metric"):
+        self.metrics[metric.name] = metric
+
+    def values(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            return self._register_thread()
+
+    def _register_thread(self) -> dict:
+        values = self._local.values = {}
+
+        with self._lock:
+            self._threads.append((threading.current_thread(), values))
+
+            if self._maintainer is None:
+                self._maintainer = threading.Thread(target=self._maintain, daemon=True)
+                self._maintainer.start()
+
+        return values
+
+    def _retire_threads(self):
+        """
+        Fold the values of threads that have ended into a single dictionary. Must be called holding the lock.
+        """
+        threads = []
+
+        for thread, values in self._threads:
+            if thread.is_alive():
+                threads.append((thread, values))
+            else:
+                merge(self._retired, values)
+
+        self._threads = threads
+
+    def collect(self) -> dict:
+        """
+        Return the sum of the values of all threads of this process.
+        """
+        with self._lock:
+            self._retire_threads()
+            total = {}
+            merge(total, self._retired)
+
+            for _, values in self._threads:
+                # Copying a dictionary is atomic, while iterating it races with the owning thread
+                merge(total, values.copy())
+
+        return total
+
+    @staticmethod
+    def directory() -> Optional[Path]:
+        directory = settings.METRICS["MULTIPROCESS_DIR"]
+        return Path(directory) if directory else None
+
+    def write_snapshot(self):
+        directory = self.directory()
+
+        if directory is None or not self._threads and not self._retired:
+            return
+
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self._process_id}.json"
+        temporary = path.with_suffix(".tmp")
+        values = [[name, list(labels), value] for (name, labels), value in self.collect().items()]
+        temporary.write_text(json.dumps(values))
+        os.replace(temporary, path)
+
+    def _maintain(self):
+        while True:
+            time.sleep(settings.METRICS["FLUSH_SECONDS"])
+
+            with self._lock:
+                self._retire_threads()
+
+            self.write_snapshot()
+
+    def collect_all(self) -> dict:
+        """
+        Return the sum of the values of this process and the latest snapshots of all other processes.
+        """
+        total = self.collect()
+        directory = self.directory()
+
+        if directory is None or not directory.is_dir():
+            return total
+
+        for path in directory.glob("*.json"):
+            if path.stem == self._process_id:
+                continue
+
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+
+            merge(total, {(name, tuple(labels)): value for name, labels, value in snapshot})
+
+        return total
+
+    def expose(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        samples = {}
+
+        for (name, labels), value in self.collect_all().items():
+            samples.setdefault(name, []).append((tuple(labels), value))
+
+        lines = []
+
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+
+            for labels, value in sorted(samples.get(name, []), key=lambda sample: sample[0]):
+                lines.extend(metric.samples(labels, value))
+
+        return "\n".join(lines) + "\n"
+
+
+class Metric:
+    type = None  # type: str
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.registry = registry
+        registry.register(self)
+
+    def samples(self, labels: tuple, value) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        values = self.registry.values()
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+    def samples(self, labels: tuple, value) -> list[str]:
+        return [f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        values = self.registry.values()
+        key = (self.name, labels)
+        # Observations per bucket (not cumulative, the last bucket being +Inf), followed by the sum of all of them
+        entry = values.get(key)
+
+        if entry is None:
+            entry = values[key] = [0] * (len(self.buckets) + 2)
+
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def samples(self, labels: tuple, value) -> list[str]:
+        lines = []
+        count = 0
+
+        for bound, observations in zip((*self.buckets, math.inf), value[:-1]):
+            count += observations
+            bucket_labels = format_labels((*self.labelnames, "le"), (*labels, format_value(float(bound))))
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+
+        lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(float(value[-1]))}")
+        lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+registry = Registry()
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests by view, method and status",
+    ("view", "method", "status"),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Duration of database queries by database", ("database",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "Duration of password hashing by algorithm", ("algorithm",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+throttled_requests = Counter("throttled_requests_total", "Requests rejected by DRF throttles by scope", ("scope",))
+verifications_created = Counter("verifications_created_total", "Verifications created by type", ("type",))
+verifications_confirmed = Counter(
+    "verification_confirmations_total", "Verification confirmation attempts by result", ("result",),
+)
+authentication_failures = Counter("authentication_failures_total", "Rejected authentication tokens")
+
+
+def record_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        db_query_duration.observe(time.perf_counter() - start, context["connection"].alias)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    # Connection wrappers outlive their database connections, so reconnecting must not add the wrapper twice
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
@@ -0,0 +1,63 @@
+import cProfile
+import time
+
+from monitoring.metrics import request_duration
+from monitoring.profiling import profiler
+from util.views import qualified_view_name
+
+
+class ProfilingMiddleware:
+    """
+    Runs sampled views under cProfile while a profile capture is active. Should be the last entry of MIDDLEWARE so
+    that only the view itself (including DRF authentication, throttling and serialization) is measured. When no
+    capture is running, the only per-request cost is a single attribute lookup.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        profile = getattr(request, "_profile", None)
+
+        if profile is not None:
+            profile[1].disable()
+            profiler.record(*profile)
+
+        return response
+
+    @staticmethod
+    def process_view(request, view_func, view_args, view_kwargs):
+        if not profiler.active:
+            return None
+
+        view_name = qualified_view_name(view_func)
+
+        if profiler.should_sample(request, view_name):
+            request._profile = (view_name, cProfile.Profile())
+            request._profile[1].enable()
+
+        return None
+
+
+class MetricsMiddleware:
+    """
+    Records the duration of every request by view, method and status. Should be the first entry of MIDDLEWARE so
+    that the time spent in all other middleware is included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        view_name = getattr(request, "_metrics_view", "unresolved")
+        request_duration.observe(time.perf_counter() - start, view_name, request.method, str(response.status_code))
+        return response
+
+    @staticmethod
+    def process_view(request, view_func, view_args, view_kwargs):
+        request._metrics_view = qualified_view_name(view_func)
+        return None
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.1 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('active', 'Active'), ('signup', 'Signup')], max_length=16)),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=8)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('sketch', models.BinaryField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='activityrollup',
+            constraint=models.UniqueConstraint(fields=('event', 'granularity', 'bucket'), name='unique_activity_rollup_bucket'),
+        ),
+    ]
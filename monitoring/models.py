@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class ActivityRollup(models.Model):
+    """
+    Incrementally maintained aggregate of one kind of event within one hour or day. Besides the number of events, it
+    holds a HyperLogLog sketch of the users involved, so that distinct users across any number of buckets are
+    estimated by merging their sketches instead of scanning the users.
+    """
+
+    class Event(models.TextChoices):
+        ACTIVE = "active"
+        SIGNUP = "signup"
+
+    class Granularity(models.TextChoices):
+        HOUR = "hour"
+        DAY = "day"
+
+    event = models.CharField(max_length=16, choices=Event.choices)
+    granularity = models.CharField(max_length=8, choices=Granularity.choices)
+    bucket = models.DateTimeField()
+    count = models.PositiveBigIntegerField(default=0)
+    sketch = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["event", "granularity", "bucket"], name="unique_activity_rollup_bucket"),
+        ]
@@ -0,0 +1,103 @@
+import cProfile
+import itertools
+import pstats
+import threading
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+
+class ViewProfile:
+    def __init__(self):
+        self.requests = 0
+        self.stats = None  # type: Optional[pstats.Stats]
+
+    def add(self, profiler: cProfile.Profile):
+        self.requests += 1
+
+        if self.stats is None:
+            self.stats = pstats.Stats(profiler)
+        else:
+            self.stats.add(profiler)
+
+    @property
+    def total_time(self) -> float:
+        return self.stats.total_tt if self.stats is not None else 0.0
+
+
+class Profiler:
+    """
+    Process-local profile capture. While a capture is running, requests are sampled (every n-th request, requests to
+    the selected views, or requests carrying the profiling header) and run under cProfile. Results are aggregated per
+    view and dumped as pstats files when the capture is stopped.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.sample_rate = 0
+        self.views = frozenset()
+        self.profiles = {}  # type: dict[str, ViewProfile]
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def output_dir(self) -> Path:
+        return Path(settings.PROFILING["OUTPUT_DIR"])
+
+    def start(self, sample_rate: int = 0, views: Optional[list[str]] = None):
+        with self._lock:
+            self.sample_rate = sample_rate
+            self.views = frozenset(views or [])
+            self.profiles = {}
+            self._counter = itertools.count(1)
+            self.active = True
+
+    def stop(self) -> list[Path]:
+        with self._lock:
+            self.active = False
+            return self.dump()
+
+    def should_sample(self, request, view_name: str) -> bool:
+        if view_name in self.views:
+            return True
+
+        if settings.PROFILING["HEADER"] in request.headers:
+            return True
+
+        return self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0
+
+    def record(self, view_name: str, profiler: cProfile.Profile):
+        with self._lock:
+            self.profiles.setdefault(view_name, ViewProfile()).add(profiler)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "active": self.active,
+                "sample_rate": self.sample_rate,
+                "views": sorted(self.views),
+                "results": {
+                    name: {"requests": p.requests, "total_time": p.total_time} for name, p in self.profiles.items()
+                },
+            }
+
+    def dump(self) -> list[Path]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+
+        for name, profile in self.profiles.items():
+            if profile.stats is None:
+                continue
+
+            path = self.dump_path(name)
+            profile.stats.dump_stats(path)
+            paths.append(path)
+
+        return paths
+
+    def dump_path(self, view_name: str) -> Path:
+        return self.output_dir / f"{view_name}.pstats"
+
+
+profiler = Profiler()
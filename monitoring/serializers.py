@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from config.settings import ACTIVITY_ROLLUPS
+from monitoring.models import ActivityRollup
+
+
+class ProfilingStartSerializer(serializers.Serializer):
+    sample_rate = serializers.IntegerField(min_value=0, default=0)
+    views = serializers.ListField(child=serializers.CharField(), default=list)
+
+
+class ActivityQuerySerializer(serializers.Serializer):
+    granularity = serializers.ChoiceField(choices=ActivityRollup.Granularity.choices,
+                                          default=ActivityRollup.Granularity.DAY)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        hourly = attrs["granularity"] == ActivityRollup.Granularity.HOUR
+        attrs.setdefault("end", timezone.now())
+        attrs.setdefault("start", attrs["end"] - (timedelta(hours=47) if hourly else timedelta(days=29)))
+
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"start": "Must not be after end"})
+
+        buckets = (attrs["end"] - attrs["start"]) / (timedelta(hours=1) if hourly else timedelta(days=1))
+
+        if buckets >= ACTIVITY_ROLLUPS["MAX_BUCKETS"]:
+            raise serializers.ValidationError(f"At most {ACTIVITY_ROLLUPS['MAX_BUCKETS']} buckets can be requested")
+
+        return attrs
+
+
+class ActivityBucketSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    requests = serializers.IntegerField()
+    active_users = serializers.IntegerField()
+    signups = serializers.IntegerField()
@@ -0,0 +1,17 @@
+from django.urls import path
+
+from monitoring import views
+
+urlpatterns = [
+    # Profiling
+    path("profiling", views.profiling_status),
+    path("profiling/start", views.profiling_start),
+    path("profiling/stop", views.profiling_stop),
+    path("profiling/<str:view_name>", views.profiling_download),
+
+    # Admission control
+    path("admission", views.admission),
+
+    # Activity rollups
+    path("activity", views.activity),
+]
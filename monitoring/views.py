@@ -0,0 +1,77 @@
+import ipaddress
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from monitoring.activity import activity_recorder
+from monitoring.metrics import registry
+from monitoring.profiling import profiler
+from monitoring.serializers import ProfilingStartSerializer, ActivityQuerySerializer, ActivityBucketSerializer
+from util.admission import admission_controller
+from util.response import DoesNotExistResponse
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def profiling_status(request):
+    return Response(profiler.summary())
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def profiling_start(request):
+    serializer = ProfilingStartSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    profiler.start(**serializer.validated_data)
+    return Response(profiler.summary())
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def profiling_stop(request):
+    paths = profiler.stop()
+    return Response({"files": [path.name for path in paths]})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def profiling_download(request, view_name):
+    path = profiler.dump_path(view_name)
+
+    # Only serve files that belong to a view of the last capture to prevent path traversal
+    if view_name not in profiler.profiles or not path.is_file():
+        return DoesNotExistResponse("Profile")
+
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def admission(request):
+    return Response(admission_controller.metrics())
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def activity(request):
+    serializer = ActivityQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+
+    # Include the events of this process that have not been merged yet
+    activity_recorder.flush()
+
+    series = activity_recorder.series(**serializer.validated_data)
+    return Response({**activity_recorder.stats(), "series": ActivityBucketSerializer(series, many=True).data})
+
+
+def metrics(request):
+    # Plain Django view, so that scrapes skip DRF's authentication, throttling and content negotiation
+    address = ipaddress.ip_address(request.META["REMOTE_ADDR"])
+
+    if not any(address in ipaddress.ip_network(network) for network in settings.METRICS["ALLOWED_NETWORKS"]):
+        return HttpResponseForbidden()
+
+    return HttpResponse(registry.expose(), content_type="text/plain; version=0.0.4; charset=utf-8")
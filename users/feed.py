@@ -0,0 +1,76 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from config.settings import USER_CHANGES
+from users.models import UserChange
+
+
+class ChangeFeed:
+    """
+    Serves batches of the user change log after a cursor. Waiting consumers are woken up immediately by commits of
+    this process and poll the database every `POLL_SECONDS` to notice commits of other processes.
+
+    IDs are assigned on insert, but concurrent transactions may commit in another order, so a gap in the IDs may be
+    filled later. Changes following a gap are therefore held back for `SETTLE_SECONDS` after their creation, as a
+    consumer whose cursor has passed the gap would never see the changes filling it. Gaps left by rolled back
+    transactions or compaction only delay the changes after them.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+
+    def notify(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def notify_on_commit(self):
+        transaction.on_commit(self.notify)
+
+    @staticmethod
+    def fetch(cursor: int, limit: int) -> list[UserChange]:
+        settled = timezone.now() - timedelta(seconds=USER_CHANGES["SETTLE_SECONDS"])
+        changes = []
+
+        for change in UserChange.objects.filter(id__gt=cursor).order_by("id")[:limit]:
+            if change.id != cursor + 1 and change.created > settled:
+                break
+
+            changes.append(change)
+            cursor = change.id
+
+        return changes
+
+    def wait(self, cursor: int, limit: int, timeout: float) -> list[UserChange]:
+        deadline = time.monotonic() + timeout
+
+        while True:
+            changes = self.fetch(cursor, limit)
+            remaining = deadline - time.monotonic()
+
+            if changes or remaining <= 0:
+                return changes
+
+            with self._condition:
+                self._condition.wait(min(remaining, USER_CHANGES["POLL_SECONDS"]))
+
+    def stream(self, cursor: int, limit: int):
+        """
+        Generate batches of changes for `STREAM_SECONDS`. Empty batches are generated every `KEEP_ALIVE_SECONDS`
+        while there are no changes, so that the connection can be kept alive.
+        """
+        deadline = time.monotonic() + USER_CHANGES["STREAM_SECONDS"]
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            changes = self.wait(cursor, limit, min(remaining, USER_CHANGES["KEEP_ALIVE_SECONDS"]))
+
+            if changes:
+                cursor = changes[-1].id
+
+            yield changes
+
+
+change_feed = ChangeFeed()
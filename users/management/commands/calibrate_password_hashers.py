@@ -0,0 +1,57 @@
+import json
+import os
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+from util.hashers import WORK_FACTORS, calibrate, calibrated_work_factors
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the configured password hashers available on this host and choose the work factor of each that "
+        "comes closest to the target time per hash, never going below Django's default. Reports the resulting "
+        "hashes per second per core and for the whole host."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", type=float, default=settings.PASSWORD_HASHING["TARGET_SECONDS"],
+                            help="Target time per hash in seconds")
+        parser.add_argument("--samples", type=int, default=3, help="Number of hashes timed per measurement")
+        parser.add_argument("--write", action="store_true",
+                            help="Store the work factors in PASSWORD_HASHING['CALIBRATION_FILE'] for the hashers")
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count() or 1
+        work_factors = {}
+
+        self.stdout.write(f"{'Algorithm':<16}{'Work factor':>22}{'Seconds/hash':>14}{'Hashes/s/core':>15}"
+                          f"{f'Hashes/s ({cores} cores)':>24}")
+
+        for hasher in get_hashers():
+            if hasher.algorithm not in WORK_FACTORS:
+                continue
+
+            try:
+                factor, seconds = calibrate(hasher, options["target"], options["samples"])
+            except ValueError as exc:
+                self.stdout.write(f"{hasher.algorithm:<16}not available: {exc}")
+                continue
+
+            work_factors[hasher.algorithm] = factor
+            attribute, _, _ = WORK_FACTORS[hasher.algorithm]
+            # Hashing is CPU-bound and the hash functions release the GIL, so throughput scales with the cores
+            self.stdout.write(f"{hasher.algorithm:<16}{f'{attribute}={factor}':>22}{seconds:>14.3f}"
+                              f"{1 / seconds:>15.1f}{cores / seconds:>24.1f}")
+
+            if seconds > options["target"] * 2:
+                self.stdout.write(self.style.WARNING(
+                    f"{hasher.algorithm} exceeds the target with Django's default work factor on this host"))
+
+        if options["write"]:
+            with open(settings.PASSWORD_HASHING["CALIBRATION_FILE"], "w") as file:
+                json.dump(work_factors, file, indent=2)
+
+            calibrated_work_factors.cache_clear()
+            self.stdout.write(self.style.SUCCESS(f"Wrote {settings.PASSWORD_HASHING['CALIBRATION_FILE']}"))
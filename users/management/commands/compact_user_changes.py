@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from config.settings import USER_CHANGES
+from users.models import UserChange
+
+
+class Command(BaseCommand):
+    help = "Compact the user change log by deleting old changes that have been superseded by a newer change"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=USER_CHANGES["COMPACT_AFTER_DAYS"],
+                            help="Only compact changes older than this many days")
+
+    def handle(self, *args, **options):
+        oldest_kept = timezone.now() - timedelta(days=options["days"])
+        superseded = UserChange.objects.filter(user_id=OuterRef("user_id"), field=OuterRef("field"), id__gt=OuterRef("id"))
+        deleted, _ = UserChange.objects.filter(Exists(superseded), created__lt=oldest_kept).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} superseded change(s)"))
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.authtoken.models import Token
+
+from users.models import User, UserDirectory
+from util.sharding import sharding_enabled, shard_for
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every user and their token to the shard they belong to according to SHARDING and rebuild the user "
+        "directory. Pending verifications of users moved off the default database are discarded. Group and "
+        "permission assignments are not moved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", action="append", dest="sources",
+                            help="Database to move users from (repeatable). Defaults to 'default' and all shards.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many users would be moved")
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError("Sharding is disabled. Configure SHARDING['SHARDS'] first.")
+
+        sources = options["sources"] or list(dict.fromkeys([DEFAULT_DB_ALIAS, *settings.SHARDING["SHARDS"]]))
+        moved = 0
+
+        for source in sources:
+            for user in User.objects.using(source).iterator():
+                target = shard_for(user.pk)
+
+                if target != source:
+                    moved += 1
+
+                if options["dry_run"]:
+                    continue
+
+                if target == source:
+                    self.index(user, source)
+                else:
+                    self.move(user, source, target)
+
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {moved} user(s)"))
+
+    @staticmethod
+    def index(user: User, shard: str):
+        token = Token.objects.using(shard).filter(user_id=user.pk).values_list("key", flat=True).first()
+        UserDirectory.objects.update_or_create(id=user.pk, defaults={
+            "shard": shard,
+            "username": user.username,
+            "email": user.email,
+            "phone_number": user.phone_number,
+            "auth_token": token,
+        })
+
+    @staticmethod
+    def move(user: User, source: str, target: str):
+        # The order matters: the directory has to point to the target before the rows on the source are deleted
+        with transaction.atomic(using=target), transaction.atomic(using=source):
+            token = Token.objects.using(source).filter(user_id=user.pk).first()
+
+            if token is not None:
+                token.delete()
+
+            user.save(using=target, force_insert=True)
+
+            if token is not None:
+                Token(key=token.key, user=user).save(using=target)
+                Token.objects.using(target).filter(key=token.key).update(created=token.created)
+
+            User.objects.using(source).filter(pk=user.pk).delete()
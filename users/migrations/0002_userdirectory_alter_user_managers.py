@@ -0,0 +1,32 @@
+# Generated by Django 4.2.1 on 2026-10-19 14:59
+
+from django.db import migrations, models
+import phonenumber_field.modelfields
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDirectory',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('shard', models.CharField(max_length=64)),
+                ('username', models.CharField(max_length=150, unique=True)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('phone_number', phonenumber_field.modelfields.PhoneNumberField(db_index=True, default=None, max_length=128, null=True, region=None)),
+                ('auth_token', models.CharField(default=None, max_length=40, null=True, unique=True)),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', users.models.UserManager()),
+            ],
+        ),
+    ]
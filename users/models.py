@@ -1,12 +1,39 @@
 import uuid
+from typing import Optional
 
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
 from django_countries.fields import CountryField
 from phonenumber_field.modelfields import PhoneNumberField
 
+from util.hashers import password_rehasher
+from util.models import DirtyFieldsMixin
+from util.sharding import sharding_enabled
 
-class User(AbstractUser):
+
+class UserManager(BaseUserManager):
+    def locate(self, **lookup) -> models.QuerySet:
+        """
+        Return a queryset on the database holding the user matching the given lookup. Without sharding, this is a
+        plain filter. With sharding, the shard is resolved through the user directory first. Supported lookups are
+        `id`, `username`, `email`, `phone_number` and `auth_token`.
+        """
+        if not sharding_enabled():
+            return self.filter(**lookup)
+
+        entry = UserDirectory.objects.filter(**lookup).values_list("id", "shard").first()
+
+        if entry is None:
+            return self.none()
+
+        return self.db_manager(entry[1]).filter(pk=entry[0])
+
+    def get_by_natural_key(self, username):
+        return self.locate(**{self.model.USERNAME_FIELD: username}).get()
+
+
+class User(DirtyFieldsMixin, AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     # Contact Information
@@ -22,3 +49,61 @@ class User(AbstractUser):
 
     # Activity tracker
     last_activity = models.DateTimeField(null=False, auto_now_add=True)
+
+    # Optimistic concurrency control, incremented by every save changing other fields than the activity tracker
+    version = models.PositiveIntegerField(default=0)
+
+    objects = UserManager()
+
+    version_field = "version"
+    unversioned_fields = ("last_login", "last_activity")
+
+    def check_password(self, raw_password):
+        # Hashes with outdated parameters are updated in the background rather than during the login
+        return check_password(raw_password, self.password, lambda password: password_rehasher.submit(self, password))
+
+
+class UserDirectory(models.Model):
+    """
+    Global index of all users, stored on the default database. It is only maintained while sharding is enabled and
+    records the shard each user is stored on, as well as the fields users are looked up by. Its unique constraints
+    enforce uniqueness across all shards.
+    """
+
+    id = models.UUIDField(primary_key=True)
+    shard = models.CharField(max_length=64)
+    username = models.CharField(max_length=150, unique=True)
+    email = models.EmailField(unique=True)
+    phone_number = PhoneNumberField(null=True, default=None, db_index=True)
+    auth_token = models.CharField(max_length=40, null=True, default=None, unique=True)
+
+    @classmethod
+    def shard_of(cls, user_id: uuid.UUID) -> Optional[str]:
+        return cls.objects.filter(id=user_id).values_list("shard", flat=True).first()
+
+
+class UserChange(models.Model):
+    """
+    Append-only log of changes to user data, one row per changed field. The ID serves as cursor for consumers of the
+    change feed. The user is not a foreign key, as users may be stored on another shard and the log outlives them.
+    """
+
+    user_id = models.UUIDField(db_index=True)
+    field = models.CharField(max_length=64)
+    value = models.JSONField(null=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def record(cls, user: User, fields: list[str]):
+        """
+        Append the current values of the given fields of the user to the log. Must be called in the transaction that
+        changes the user, so that the log never misses or invents a change.
+        """
+        changes = []
+
+        for name in fields:
+            field = User._meta.get_field(name)
+            value = None if field.value_from_object(user) is None else field.value_to_string(user)
+            changes.append(cls(user_id=user.pk, field=name, value=value))
+
+        cls.objects.bulk_create(changes)
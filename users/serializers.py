@@ -5,11 +5,15 @@ from django.core.exceptions import ValidationError
 from rest_framework import serializers
 from rest_framework.fields import CurrentUserDefault
 
-from users.models import User
-from verification.models import Verification
+from config.settings import USER_CHANGES
+from monitoring.activity import activity_recorder, Event
+from users.feed import change_feed
+from users.models import User, UserChange
+from util.fieldsets import SparseFieldsetMixin
+from verification.consumption import VerificationSecretMixin
 
 
-class PublicUserSerializer(serializers.ModelSerializer):
+class PublicUserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -24,7 +28,7 @@ class PublicUserSerializer(serializers.ModelSerializer):
         ]
 
 
-class PrivateUserSerializer(serializers.ModelSerializer):
+class PrivateUserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     address_country = serializers.SerializerMethodField()
 
     class Meta:
@@ -61,6 +65,18 @@ class PrivateUserSerializer(serializers.ModelSerializer):
         return user.address_country.name if user.address_country and user.address_country.code else None
 
 
+class UserChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserChange
+        fields = ["id", "user_id", "field", "value", "created"]
+
+
+class UserChangesQuerySerializer(serializers.Serializer):
+    cursor = serializers.IntegerField(min_value=0, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=USER_CHANGES["MAX_BATCH"], default=USER_CHANGES["MAX_BATCH"])
+    wait = serializers.FloatField(min_value=0, max_value=USER_CHANGES["MAX_WAIT_SECONDS"], default=0)
+
+
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField()
@@ -71,92 +87,70 @@ class ChangePasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField()
 
 
-class ChangeEmailAddressSerializer(serializers.Serializer):
+class ChangeEmailAddressSerializer(VerificationSecretMixin, serializers.Serializer):
     user = serializers.HiddenField(default=CurrentUserDefault())
     secret = serializers.UUIDField()
 
-    def validate_secret(self, value):
-        Verification.clear_outdated()
+    verification_type = "email"
+    authenticated_verification = True
 
-        try:
-            verification = Verification.objects.get(secret=value)
-        except Verification.DoesNotExist:
-            raise serializers.ValidationError("Invalid secret")
-
-        if not verification.is_email():
-            raise serializers.ValidationError("Secret must be from an email verification")
-
-        if not verification.is_authenticated():
-            raise serializers.ValidationError("Secret must be from an authenticated verification")
-
-        if verification.user != self.context["request"].user:
-            raise serializers.ValidationError("User mismatch")
-
-        if User.objects.filter(email=verification.email).exists():
+    def validate_verification(self, verification):
+        if User.objects.locate(email=verification.email).exists():
             raise serializers.ValidationError("Email address already in use")
 
-        return value
-
     def create(self, validated_data):
-        verification = Verification.objects.get(secret=validated_data["secret"])
-        user = verification.user
-        user.email = verification.email
-        user.save()
-        verification.delete()
+        user = validated_data["user"]
+
+        with self.consume() as verification:
+            user.email = verification.email
+            user.save()
+            UserChange.record(user, ["email"])
+
+        change_feed.notify_on_commit()
         return user
 
     def update(self, instance, validated_data):
         raise NotImplementedError("This method should never be called")
 
 
-class ChangePhoneNumberSerializer(serializers.Serializer):
+class ChangePhoneNumberSerializer(VerificationSecretMixin, serializers.Serializer):
     user = serializers.HiddenField(default=CurrentUserDefault())
     secret = serializers.UUIDField()
 
-    def validate_secret(self, value):
-        Verification.clear_outdated()
-
-        try:
-            verification = Verification.objects.get(secret=value)
-        except Verification.DoesNotExist:
-            raise serializers.ValidationError("Invalid secret")
-
-        if not verification.is_phone_number():
-            raise serializers.ValidationError("Secret must be from a phone verification")
-
-        if not verification.is_authenticated():
-            raise serializers.ValidationError("Secret must be from an authenticated verification")
-
-        if verification.user != self.context["request"].user:
-            raise serializers.ValidationError("User mismatch")
+    verification_type = "phone_number"
+    authenticated_verification = True
 
-        if User.objects.filter(phone_number=verification.phone_number).exists():
+    def validate_verification(self, verification):
+        if User.objects.locate(phone_number=verification.phone_number).exists():
             raise serializers.ValidationError("Phone number already in use")
 
-        return value
-
     def create(self, validated_data):
-        verification = Verification.objects.get(secret=validated_data["secret"])
-        user = verification.user
-        user.phone_number = verification.phone_number
-        user.save()
-        verification.delete()
+        user = validated_data["user"]
+
+        with self.consume() as verification:
+            user.phone_number = verification.phone_number
+            user.save()
+            UserChange.record(user, ["phone_number"])
+
+        change_feed.notify_on_commit()
         return user
 
     def update(self, instance, validated_data):
         raise NotImplementedError("This method should never be called")
 
 
-class SignupSerializer(serializers.ModelSerializer):
+class SignupSerializer(VerificationSecretMixin, serializers.ModelSerializer):
     secret = serializers.UUIDField()
 
+    verification_type = "email"
+
     class Meta:
         model = User
         fields = ["username", "password", "first_name", "last_name", "secret"]
 
     @staticmethod
     def validate_username(value):
-        if User.objects.filter(username=value).exists():
+        if User.objects.locate(username=value).exists():
             raise serializers.ValidationError("This username is already registered")
 
         return value
@@ -171,37 +165,21 @@ class SignupSerializer(serializers.ModelSerializer):
         return value
 
     @staticmethod
-    def validate_secret(value):
-        Verification.clear_outdated()
-
-        try:
-            verification = Verification.objects.get(secret=value)
-        except Verification.DoesNotExist:
-            raise serializers.ValidationError("Invalid secret")
-
-        if not verification.is_email():
-            raise serializers.ValidationError("Secret must be from an email verification")
-
-        if verification.is_authenticated():
-            raise serializers.ValidationError("Secret must be from an unauthenticated verification")
-
-        if User.objects.filter(email=verification.email).exists():
+    def validate_verification(verification):
+        if User.objects.locate(email=verification.email).exists():
             raise serializers.ValidationError("Email address already in use")
 
-        return value
-
     def create(self, validated_data):
-        verification = Verification.objects.get(secret=validated_data["secret"])
-
-        user = User.objects.create_user(
-            username=validated_data["username"],
-            email=verification.email,
-            password=validated_data["password"],
-            first_name=validated_data["first_name"],
-            last_name=validated_data["last_name"]
-        )
+        with self.consume() as verification:
+            user = User.objects.create_user(
+                username=validated_data["username"],
+                email=verification.email,
+                password=validated_data["password"],
+                first_name=validated_data["first_name"],
+                last_name=validated_data["last_name"]
+            )
 
-        verification.delete()
+        activity_recorder.record_on_commit(Event.SIGNUP, user.pk)
 
         return user
 
@@ -209,40 +187,17 @@ class SignupSerializer(serializers.ModelSerializer):
         raise NotImplementedError("This method should never be called")
 
 
-class ResetPasswordSerializer(serializers.Serializer):
+class ResetPasswordSerializer(VerificationSecretMixin, serializers.Serializer):
     password = serializers.CharField(validators=[validate_password])
     secret = serializers.UUIDField()
 
-    @staticmethod
-    def validate_secret(value):
-        Verification.clear_outdated()
-
-        try:
-            verification = Verification.objects.get(secret=value)
-        except Verification.DoesNotExist:
-            raise serializers.ValidationError("Invalid secret")
-
-        if verification.is_authenticated():
-            raise serializers.ValidationError("Secret must be from an unauthenticated verification")
-
-        return value
-
     def create(self, validated_data):
-        verification = Verification.objects.get(secret=validated_data["secret"])
-
-        if verification.is_email():
-            user = User.objects.get(email=verification.email)
-        elif verification.is_phone_number():
-            user = User.objects.get(phone_number=verification.phone_number)
-        elif verification.is_username():
-            user = User.objects.get(username=verification.username)
-        else:
-            raise NotImplementedError("Invalid program path - unknown verification type")
-
-        user.set_password(validated_data["password"])
-        user.save()
-
-        verification.delete()
+        with self.consume() as verification:
+            # The type of a verification is the name of the field identifying the user
+            lookup = {verification.type(): getattr(verification, verification.type())}
+            user = User.objects.locate(**lookup).get()
+            user.set_password(validated_data["password"])
+            user.save()
 
         return user
 
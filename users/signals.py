@@ -0,0 +1,46 @@
+from django.db.models.signals import pre_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.models import User, UserDirectory
+from util.sharding import sharding_enabled
+
+
+DIRECTORY_FIELDS = {"username", "email", "phone_number"}
+
+
+@receiver(pre_save, sender=User)
+def update_directory_entry(sender, instance: User, using: str, raw: bool = False, update_fields=None, **kwargs):
+    # Written before the user itself, so that the directory's unique constraints reject duplicates on any shard
+    if not sharding_enabled():
+        return
+
+    # Partial saves of the user leaving the indexed fields untouched do not affect the directory
+    if update_fields is not None and not DIRECTORY_FIELDS & update_fields:
+        return
+
+    UserDirectory.objects.update_or_create(id=instance.pk, defaults={
+        "shard": using,
+        "username": instance.username,
+        "email": instance.email,
+        "phone_number": instance.phone_number,
+    })
+
+
+@receiver(post_delete, sender=User)
+def delete_directory_entry(sender, instance: User, using: str, **kwargs):
+    # Moving a user to another shard deletes it from the old one after the directory already points to the new one
+    if sharding_enabled():
+        UserDirectory.objects.filter(id=instance.pk, shard=using).delete()
+
+
+@receiver(pre_save, sender=Token)
+def update_directory_token(sender, instance: Token, **kwargs):
+    if sharding_enabled():
+        UserDirectory.objects.filter(id=instance.user_id).update(auth_token=instance.key)
+
+
+@receiver(post_delete, sender=Token)
+def delete_directory_token(sender, instance: Token, **kwargs):
+    if sharding_enabled():
+        UserDirectory.objects.filter(id=instance.user_id, auth_token=instance.key).update(auth_token=None)
@@ -1,3 +1,76 @@
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-# Create your tests here.
+from users.models import User
+from util.models import ConcurrentUpdate
+
+
+class DirtyFieldsMixinTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password="password")
+
+    def load(self) -> User:
+        return User.objects.get(pk=self.user.pk)
+
+    def test_save_without_changes_issues_no_query(self):
+        user = self.load()
+
+        with self.assertNumQueries(0):
+            user.save()
+
+    def test_save_updates_only_changed_fields(self):
+        user = self.load()
+        user.first_name = "Alice"
+
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"first_name"', queries[0]["sql"])
+        self.assertNotIn('"email"', queries[0]["sql"])
+        self.assertEqual(user.dirty_fields(), [])
+        self.assertEqual(self.load().first_name, "Alice")
+
+    def test_save_increments_version(self):
+        user = self.load()
+        user.first_name = "Alice"
+        user.save()
+
+        self.assertEqual(user.version, 1)
+        self.assertEqual(self.load().version, 1)
+
+    def test_save_of_stale_instance_raises_concurrent_update(self):
+        first, second = self.load(), self.load()
+        first.first_name = "Alice"
+        first.save()
+        second.last_name = "Smith"
+
+        with self.assertRaises(ConcurrentUpdate), transaction.atomic():
+            second.save()
+
+        # The failed save neither changes the row nor leaves the instance with an incremented version
+        stored = self.load()
+        self.assertEqual((stored.first_name, stored.last_name, stored.version), ("Alice", "", 1))
+        self.assertEqual(second.version, 0)
+
+    def test_save_of_reloaded_instance_succeeds(self):
+        first, second = self.load(), self.load()
+        first.first_name = "Alice"
+        first.save()
+        second.refresh_from_db()
+        second.last_name = "Smith"
+        second.save()
+
+        stored = self.load()
+        self.assertEqual((stored.first_name, stored.last_name, stored.version), ("Alice", "Smith", 2))
+
+    def test_unversioned_fields_neither_increment_nor_check_version(self):
+        first, second = self.load(), self.load()
+        first.first_name = "Alice"
+        first.save()
+        second.last_activity = timezone.now()
+        second.save()
+
+        self.assertEqual(self.load().version, 1)
@@ -15,4 +15,5 @@ urlpatterns = [
     # User Data
     path("me", views.MeView.as_view()),
     path("<uuid:user_id>", views.user_by_id),
+    path("changes", views.user_changes),
 ]
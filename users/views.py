@@ -1,19 +1,30 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models.functions import Now
+from django.http import StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
 from rest_framework.authtoken.models import Token
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.exceptions import ValidationError as ValidationErrorDRF
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.status import HTTP_204_NO_CONTENT, HTTP_403_FORBIDDEN
+from rest_framework.status import HTTP_204_NO_CONTENT, HTTP_403_FORBIDDEN, HTTP_412_PRECONDITION_FAILED
 from rest_framework.views import APIView
 
 from config.settings import AUTH_COOKIE_KEY
-from users.models import User
+from monitoring.activity import activity_recorder, Event
+from monitoring.health import readiness
+from users.feed import change_feed
+from users.models import User, UserChange
 from users.serializers import LoginSerializer, PrivateUserSerializer, ChangePasswordSerializer, PublicUserSerializer, \
-    SignupSerializer, ChangeEmailAddressSerializer, ChangePhoneNumberSerializer, ResetPasswordSerializer
+    SignupSerializer, ChangeEmailAddressSerializer, ChangePhoneNumberSerializer, ResetPasswordSerializer, \
+    UserChangeSerializer, UserChangesQuerySerializer
+from util.fieldsets import requested_fields
+from util.models import ConcurrentUpdate
+from util.renderers import EventStreamRenderer
 from util.response import StatusResponse, DoesNotExistResponse
 
 
@@ -32,14 +43,15 @@ def login(request):
         return StatusResponse("Invalid credentials", HTTP_403_FORBIDDEN)
 
     # Get authentication token for user
-    token, _ = Token.objects.get_or_create(user=user)
+    token, _ = Token.objects.db_manager(hints={"instance": user}).get_or_create(user=user)
 
     # Update last login and activity
     user.last_login = Now()
     user.last_activity = Now()
     user.save()
-    user.refresh_from_db()
+    user.refresh_from_db(fields=["last_login", "last_activity"])
     request.user = user
+    activity_recorder.record(Event.ACTIVE, user.pk)
 
     # Set cookie and return user data
     user_serializer = PrivateUserSerializer(user, context={"request": request})
@@ -115,22 +127,88 @@ def reset_password(request):
 
 class MeView(APIView):
     def get(self, request):
-        serializer = PrivateUserSerializer(request.user, context={"request": request})
-        return Response(serializer.data)
+        # The user row has already been loaded by the authentication class, so only the representation is pruned
+        fields = requested_fields(request, PrivateUserSerializer)
+        serializer = PrivateUserSerializer(request.user, fields=fields, context={"request": request})
+        return Response(serializer.data, headers={"ETag": self.etag(request.user)})
 
     def patch(self, request):
+        if_match = request.headers.get("If-Match")
+
+        if if_match is not None and not self.matches(if_match, request.user):
+            return StatusResponse("The user was changed in the meantime", HTTP_412_PRECONDITION_FAILED)
+
         serializer = PrivateUserSerializer(request.user, data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data)
+
+        before = {name: getattr(request.user, name) for name in serializer.validated_data}
+
+        try:
+            with transaction.atomic():
+                serializer.save()
+                UserChange.record(request.user, [name for name, value in before.items()
+                                                 if getattr(request.user, name) != value])
+        except ConcurrentUpdate:
+            if if_match is None:
+                raise
+
+            return StatusResponse("The user was changed in the meantime", HTTP_412_PRECONDITION_FAILED)
+
+        change_feed.notify_on_commit()
+        return Response(serializer.data, headers={"ETag": self.etag(request.user)})
+
+    @staticmethod
+    def etag(user: User) -> str:
+        return quote_etag(str(user.version))
+
+    @classmethod
+    def matches(cls, if_match: str, user: User) -> bool:
+        etags = parse_etags(if_match)
+        return "*" in etags or cls.etag(user) in etags
 
 
 @api_view(["GET"])
 def user_by_id(request, user_id):
+    fields = requested_fields(request, PublicUserSerializer)
+    queryset = User.objects.locate(id=user_id)
+
     try:
-        user = User.objects.get(id=user_id)
+        user = (queryset if fields is None else queryset.only(*fields)).get()
     except User.DoesNotExist:
         return DoesNotExistResponse("User")
 
-    serializer = PublicUserSerializer(user, context={"request": request})
+    serializer = PublicUserSerializer(user, fields=fields, context={"request": request})
     return Response(serializer.data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def user_changes(request):
+    serializer = UserChangesQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+
+    cursor = serializer.validated_data.get("cursor")
+    limit = serializer.validated_data["limit"]
+
+    # Reconnecting event stream clients resume from the ID of the last event they received
+    if cursor is None:
+        cursor = serializer.fields["cursor"].run_validation(request.headers.get("Last-Event-ID", 0))
+
+    if request.accepted_renderer.format == EventStreamRenderer.format:
+        response = StreamingHttpResponse(user_change_events(cursor, limit), content_type=EventStreamRenderer.media_type)
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    with readiness.idle():
+        changes = change_feed.wait(cursor, limit, serializer.validated_data["wait"])
+    serializer = UserChangeSerializer(changes, many=True)
+    return Response({"changes": serializer.data, "cursor": changes[-1].id if changes else cursor})
+
+
+def user_change_events(cursor: int, limit: int):
+    for changes in change_feed.stream(cursor, limit):
+        if changes:
+            yield EventStreamRenderer.event(UserChangeSerializer(changes, many=True).data, event_id=changes[-1].id)
+        else:
+            yield ": keep-alive\n\n"
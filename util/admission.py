@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from rest_framework.status import HTTP_503_SERVICE_UNAVAILABLE
+
+from util.response import StatusJsonResponse
+from util.views import qualified_view_name
+
+
+class CostClass:
+    """
+    Limits the number of concurrently executed requests of one cost class. Requests exceeding the limit wait in a
+    bounded queue for at most `queue_timeout` seconds and are rejected if the queue is full or the deadline passes.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.queue_seconds = 0.0
+        self._semaphore = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                if self.queued >= self.max_queue:
+                    self.shed += 1
+                    return False
+
+                self.queued += 1
+
+            start = time.monotonic()
+            admitted = self._semaphore.acquire(timeout=self.queue_timeout)
+
+            with self._lock:
+                self.queued -= 1
+                self.queue_seconds += time.monotonic() - start
+
+                if not admitted:
+                    self.shed += 1
+                    return False
+
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+        self._semaphore.release()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "queue_seconds": self.queue_seconds,
+            }
+
+
+class AdmissionController:
+    def __init__(self):
+        self._classes = None  # type: Optional[dict[str, CostClass]]
+
+    @property
+    def classes(self) -> dict[str, CostClass]:
+        if self._classes is None:
+            self._classes = {
+                name: CostClass(name, config["CONCURRENCY"], config["MAX_QUEUE"], config["QUEUE_TIMEOUT_SECONDS"])
+                for name, config in settings.ADMISSION_CONTROL["CLASSES"].items()
+            }
+
+        return self._classes
+
+    def cost_class(self, view_name: str) -> CostClass:
+        config = settings.ADMISSION_CONTROL
+        return self.classes[config["VIEWS"].get(view_name, config["DEFAULT_CLASS"])]
+
+    def metrics(self) -> dict:
+        return {name: cost_class.metrics() for name, cost_class in self.classes.items()}
+
+
+admission_controller = AdmissionController()
+
+
+class ReleasingStream:
+    """
+    Content of a streaming response, releasing its cost class once the response is closed, whether or not the stream
+    was consumed to the end.
+    """
+
+    def __init__(self, content, cost_class: CostClass):
+        self.content = content
+        self.cost_class = cost_class
+        self._released = False
+
+    def __iter__(self):
+        return iter(self.content)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self.cost_class.release()
+
+
+class AdmissionControlMiddleware:
+    """
+    Assigns every view a cost class and sheds load with 503 and `Retry-After` once the concurrency limit and queue of
+    its class are exhausted, instead of letting requests time out while waiting for a worker.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        # Creates the semaphores while the server is still single-threaded
+        admission_controller.classes
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        cost_class = getattr(request, "_cost_class", None)
+
+        if cost_class is not None and response.streaming:
+            # Streams occupy their worker until the server closes the response, not until the view returns
+            response.streaming_content = ReleasingStream(response.streaming_content, cost_class)
+        elif cost_class is not None:
+            cost_class.release()
+
+        return response
+
+    @staticmethod
+    def process_view(request, view_func, view_args, view_kwargs):
+        cost_class = admission_controller.cost_class(qualified_view_name(view_func))
+
+        if not cost_class.acquire():
+            response = StatusJsonResponse("Server overloaded", HTTP_503_SERVICE_UNAVAILABLE)
+            response["Retry-After"] = str(settings.ADMISSION_CONTROL["RETRY_AFTER_SECONDS"])
+            return response
+
+        request._cost_class = cost_class
+        return None
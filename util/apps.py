@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class UtilConfig(AppConfig):
+    name = 'util'
+
+    def ready(self):
+        # Registers the system checks comparing docs/openapi.yml with the serializers and timing password hashing
+        from util import hashers, validation  # noqa: F401
@@ -3,6 +3,8 @@ from django.http import HttpRequest
 from rest_framework import authentication, exceptions
 
 from config.settings import AUTH_COOKIE_KEY
+from monitoring.activity import activity_recorder, Event
+from monitoring.metrics import authentication_failures
 from users.models import User
 
 
@@ -14,13 +16,15 @@ class CookieAuthentication(authentication.BaseAuthentication):
             return None
 
         try:
-            user = User.objects.get(auth_token=token)
+            user = User.objects.locate(auth_token=token).get()
         except User.DoesNotExist:
+            authentication_failures.inc()
             raise exceptions.AuthenticationFailed("No user with this token")
 
         # Set last activity to NOW() and resolve NOW() call in DB
         user.last_activity = Now()
         user.save()
-        user.refresh_from_db()
+        user.refresh_from_db(fields=["last_activity"])
+        activity_recorder.record(Event.ACTIVE, user.pk)
 
         return user, user.auth_token
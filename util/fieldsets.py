@@ -0,0 +1,44 @@
+from typing import Optional, Iterable
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+FIELDS_QUERY_PARAMETER = "fields"
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that accepts an optional `fields` keyword argument and drops every serializer field that is not
+    part of it. Passing `fields=None` keeps the full representation.
+    """
+
+    def __init__(self, *args, fields: Optional[Iterable[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def requested_fields(request: Request, serializer_class) -> Optional[list[str]]:
+    """
+    Parse the comma-separated `fields` query parameter and validate it against the fields allowed by the given
+    serializer class. Returns None if the parameter is absent, i.e. the full representation was requested.
+    """
+    value = request.query_params.get(FIELDS_QUERY_PARAMETER, None)
+
+    if value is None:
+        return None
+
+    fields = list(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    allowed = serializer_class.Meta.fields
+
+    if not fields:
+        raise ValidationError({FIELDS_QUERY_PARAMETER: ["At least one field must be requested"]})
+
+    invalid = [f for f in fields if f not in allowed]
+
+    if invalid:
+        raise ValidationError({FIELDS_QUERY_PARAMETER: [f"Unknown field: {f}" for f in invalid]})
+
+    return fields
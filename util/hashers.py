@@ -0,0 +1,235 @@
+import copy
+import json
+import math
+import os
+import queue
+import statistics
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core import checks
+from django.db import connections
+
+from monitoring.metrics import password_hash_duration
+
+# Attribute holding the work factor of each algorithm, its key in decoded hashes and how the cost of a hash grows with
+# it: proportionally ("linear"), doubling per increment ("log2") or proportionally with the factor being a power of two
+# ("exp2")
+WORK_FACTORS = {
+    "pbkdf2_sha256": ("iterations", "iterations", "linear"),
+    "pbkdf2_sha1": ("iterations", "iterations", "linear"),
+    "argon2": ("time_cost", "time_cost", "linear"),
+    "bcrypt_sha256": ("rounds", "work_factor", "log2"),
+    "scrypt": ("work_factor", "work_factor", "exp2"),
+}
+
+
+@lru_cache(maxsize=None)
+def calibrated_work_factors() -> dict[str, int]:
+    try:
+        with open(settings.PASSWORD_HASHING["CALIBRATION_FILE"]) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def django_hasher(hasher: hashers.BasePasswordHasher) -> hashers.BasePasswordHasher:
+    """
+    Return a new instance of the Django hasher the given hasher is based on, with Django's default work factor and
+    without recording metrics.
+    """
+    return next(cls for cls in type(hasher).__mro__ if cls.__module__ == hashers.__name__)()
+
+
+def benchmark(hasher: hashers.BasePasswordHasher, samples: int = 3) -> float:
+    """
+    Return the median duration of hashing a password in seconds. Raises `ValueError` if the hasher's library is not
+    installed or the work factor exceeds its memory limit.
+    """
+    salt = hasher.salt()
+    durations = []
+
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.encode("benchmark password", salt)
+        durations.append(time.perf_counter() - start)
+
+    return statistics.median(durations)
+
+
+def calibrate(hasher: hashers.BasePasswordHasher, target: float, samples: int = 3) -> tuple[int, float]:
+    """
+    Return the work factor for the hasher's algorithm coming closest to `target` seconds per hash on this host, and
+    the seconds per hash it takes. Never goes below Django's default, which is the recommended minimum.
+    """
+    attribute, _, scaling = WORK_FACTORS[hasher.algorithm]
+    hasher = django_hasher(hasher)
+    default = getattr(hasher, attribute)
+    ratio = target / benchmark(hasher, samples)
+
+    if scaling == "linear":
+        factor = max(default, int(round(default * ratio, -3 if default >= 10000 else 0)))
+    else:
+        steps = max(0, round(math.log2(ratio)))
+        factor = default + steps if scaling == "log2" else default * 2 ** steps
+
+    while True:
+        setattr(hasher, attribute, factor)
+
+        try:
+            return factor, benchmark(hasher, samples)
+        except ValueError:
+            # Higher work factors of scrypt may exceed its memory limit
+            if scaling != "exp2" or factor <= default:
+                raise
+
+            factor //= 2
+
+
+class CalibratedHasherMixin:
+    """
+    Uses the work factor written by `manage.py calibrate_password_hashers --write` for this host instead of Django's
+    default. Hashes are only updated on the next login of their user if their work factor makes them cheaper than
+    `REHASH_BELOW` times the calibrated one, so that hosts calibrated to slightly different work factors do not keep
+    replacing each other's hashes.
+    """
+
+    def __init__(self):
+        factor = calibrated_work_factors().get(self.algorithm)
+
+        if factor is not None:
+            setattr(self, WORK_FACTORS[self.algorithm][0], factor)
+
+    def must_update(self, encoded):
+        attribute, key, scaling = WORK_FACTORS[self.algorithm]
+        stored, preferred = self.decode(encoded)[key], getattr(self, attribute)
+        cost = 2.0 ** (stored - preferred) if scaling == "log2" else stored / preferred
+
+        if cost < settings.PASSWORD_HASHING["REHASH_BELOW"]:
+            return True
+
+        # Other parameters, such as the salt length or the memory cost, are still compared with the preferred ones
+        hasher = copy.copy(self)
+        setattr(hasher, attribute, stored)
+        return super(CalibratedHasherMixin, hasher).must_update(encoded)
+
+
+class PBKDF2PasswordHasher(CalibratedHasherMixin, hashers.PBKDF2PasswordHasher):
+    """
+    Django's default hasher, recording the duration of every hash. Verifying a password hashes it as well, so logins
+    are covered too. Keeps the algorithm name, so existing hashes remain valid.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        start = time.perf_counter()
+
+        try:
+            return super().encode(password, salt, iterations)
+        finally:
+            password_hash_duration.observe(time.perf_counter() - start, self.algorithm)
+
+
+class PBKDF2SHA1PasswordHasher(CalibratedHasherMixin, hashers.PBKDF2SHA1PasswordHasher):
+    pass
+
+
+class Argon2PasswordHasher(CalibratedHasherMixin, hashers.Argon2PasswordHasher):
+    pass
+
+
+class BCryptSHA256PasswordHasher(CalibratedHasherMixin, hashers.BCryptSHA256PasswordHasher):
+    pass
+
+
+class ScryptPasswordHasher(CalibratedHasherMixin, hashers.ScryptPasswordHasher):
+    pass
+
+
+class PasswordRehasher:
+    """
+    Updates hashes stored with another algorithm or work factor than the preferred hasher's in a background thread,
+    so that logins do not pay for a second hash. Only the hash that was verified is replaced, so a password changed in
+    the meantime is kept. If more than `MAX_PENDING_REHASHES` updates are pending, further ones are skipped until the
+    next login of their user.
+    """
+
+    def __init__(self):
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(settings.PASSWORD_HASHING["MAX_PENDING_REHASHES"])
+        self._worker = None
+
+    def submit(self, user, raw_password: str):
+        try:
+            self._queue.put_nowait((type(user), user.pk, user._state.db, user.password, raw_password))
+        except queue.Full:
+            return
+
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, daemon=True)
+                self._worker.start()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+
+            try:
+                self.rehash(*job)
+            finally:
+                # Connections of this thread are not closed by the request cycle
+                connections.close_all()
+                self._queue.task_done()
+
+    @staticmethod
+    def rehash(model, pk, database: str, encoded: str, raw_password: str):
+        model._default_manager.using(database).filter(pk=pk, password=encoded).update(
+            password=hashers.make_password(raw_password)
+        )
+
+    def join(self):
+        """
+        Block until all pending updates are done.
+        """
+        self._queue.join()
+
+
+password_rehasher = PasswordRehasher()
+
+
+@checks.register()
+def check_password_hashing(app_configs, **kwargs):
+    """
+    Warn if hashing a password with the preferred hasher takes less than half or more than twice the target time on
+    this host, which usually means the hashers have not been calibrated for it.
+    """
+    config = settings.PASSWORD_HASHING
+
+    if not config["CHECK_ON_STARTUP"]:
+        return []
+
+    hasher = hashers.get_hasher()
+    attribute, _, _ = WORK_FACTORS.get(hasher.algorithm, (None, None, None))
+
+    if attribute is None:
+        return []
+
+    instance = django_hasher(hasher)
+    setattr(instance, attribute, getattr(hasher, attribute))
+    seconds = benchmark(instance, samples=1)
+
+    if config["TARGET_SECONDS"] / 2 <= seconds <= config["TARGET_SECONDS"] * 2:
+        return []
+
+    return [checks.Warning(
+        f"Hashing a password with {hasher.algorithm} takes {seconds:.3f}s, the target is {config['TARGET_SECONDS']}s",
+        hint="Run `manage.py calibrate_password_hashers --write` on this host, or adjust "
+             "PASSWORD_HASHING['TARGET_SECONDS'] if even Django's default work factor exceeds it",
+        id="util.W001",
+    )]
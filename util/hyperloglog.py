@@ -0,0 +1,50 @@
+import hashlib
+import math
+from typing import Optional
+
+
+class HyperLogLog:
+    """
+    Sketch estimating the number of distinct values added to it in constant space. With the default precision of 12,
+    it uses 4096 one-byte registers and has a standard error of about 1.6%. Sketches are merged by taking the maximum
+    of each register, so merging is commutative and idempotent, and the union of any number of sketches is estimated
+    as accurately as a single one.
+    """
+
+    def __init__(self, registers: Optional[bytes] = None, precision: int = 12):
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << precision)
+        self.precision = len(self.registers).bit_length() - 1
+
+        if len(self.registers) != 1 << self.precision:
+            raise ValueError("The number of registers must be a power of two")
+
+    def add(self, value: bytes):
+        x = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+        width = 64 - self.precision
+        index = x >> width
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = width - (x & ((1 << width) - 1)).bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        if len(other.registers) != len(self.registers):
+            raise ValueError("Only sketches with the same precision can be merged")
+
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+
+        # Linear counting is more accurate for small cardinalities
+        if estimate <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+
+        return round(estimate)
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.registers)
@@ -0,0 +1,109 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_409_CONFLICT, HTTP_422_UNPROCESSABLE_ENTITY, \
+    HTTP_429_TOO_MANY_REQUESTS
+
+from util.response import StatusJsonResponse
+
+IN_FLIGHT = "in_flight"
+DONE = "done"
+
+
+class IdempotencyMiddleware:
+    """
+    Makes POST requests carrying an `Idempotency-Key` header safe to retry. The first request with a key is executed
+    and its response is stored for `TTL_SECONDS`, keyed by key and principal (auth token or client address). Retries
+    are answered from the store without executing the view again, and concurrent duplicates wait for the result of
+    the request in flight. Reusing a key for a different request is rejected.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.IDEMPOTENCY
+        key = request.headers.get(config["HEADER"])
+
+        if request.method != "POST" or key is None:
+            return self.get_response(request)
+
+        if not 0 < len(key) <= 255:
+            return StatusJsonResponse(f"{config['HEADER']} must have between 1 and 255 characters",
+                                      HTTP_400_BAD_REQUEST)
+
+        cache = caches[config["CACHE"]]
+        cache_key = "idempotency:" + self.digest(self.principal(request), key)
+        fingerprint = self.digest(request.path, request.body)
+
+        if not cache.add(cache_key, {"state": IN_FLIGHT, "fingerprint": fingerprint}, config["LOCK_SECONDS"]):
+            return self.replay(cache, cache_key, fingerprint)
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+
+        # Failures that are expected to succeed on retry are not stored
+        if response.status_code >= 500 or response.status_code == HTTP_429_TOO_MANY_REQUESTS or response.streaming:
+            cache.delete(cache_key)
+            return response
+
+        cache.set(cache_key, {
+            "state": DONE,
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "headers": [(k, v) for k, v in response.items()],
+            "cookies": response.cookies,
+            "content": response.content,
+        }, config["TTL_SECONDS"])
+
+        return response
+
+    def replay(self, cache, cache_key: str, fingerprint: str):
+        config = settings.IDEMPOTENCY
+        deadline = time.monotonic() + config["WAIT_SECONDS"]
+        entry = cache.get(cache_key)
+
+        while entry is not None and entry["state"] == IN_FLIGHT and time.monotonic() < deadline:
+            time.sleep(config["POLL_SECONDS"])
+            entry = cache.get(cache_key)
+
+        if entry is None:
+            # The original request failed in the meantime and may be retried
+            return StatusJsonResponse("The original request failed, please retry", HTTP_409_CONFLICT)
+
+        if entry["fingerprint"] != fingerprint:
+            return StatusJsonResponse(f"{config['HEADER']} was already used for another request",
+                                      HTTP_422_UNPROCESSABLE_ENTITY)
+
+        if entry["state"] == IN_FLIGHT:
+            return StatusJsonResponse("The original request is still in progress", HTTP_409_CONFLICT)
+
+        response = HttpResponse(entry["content"], status=entry["status"])
+
+        for header, value in entry["headers"]:
+            response[header] = value
+
+        response.cookies = entry["cookies"]
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    @staticmethod
+    def principal(request) -> str:
+        token = request.COOKIES.get(settings.AUTH_COOKIE_KEY)
+        return f"token:{token}" if token else f"address:{request.META.get('REMOTE_ADDR')}"
+
+    @staticmethod
+    def digest(*parts) -> str:
+        sha = hashlib.sha256()
+
+        for part in parts:
+            sha.update(part if isinstance(part, bytes) else part.encode())
+            sha.update(b"\0")
+
+        return sha.hexdigest()
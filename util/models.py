@@ -0,0 +1,100 @@
+from typing import Iterable, Optional
+
+from rest_framework.exceptions import APIException
+from rest_framework.status import HTTP_409_CONFLICT
+
+
+class ConcurrentUpdate(APIException):
+    status_code = HTTP_409_CONFLICT
+    default_detail = "The resource was changed concurrently, please retry"
+    default_code = "concurrent_update"
+
+
+class DirtyFieldsMixin:
+    """
+    Tracks the values fields were loaded with, so that saving an existing instance updates only the changed columns
+    and does not query the database at all if nothing changed. Fields assigned an expression, such as `Now()`, are
+    always considered changed.
+
+    If `version_field` is set, saves changing any other field than `unversioned_fields` increment the version and
+    only succeed if the row still has the version it was loaded with, raising `ConcurrentUpdate` otherwise. Like an
+    `IntegrityError`, it breaks an enclosing transaction, so saves within one should be wrapped in `atomic()`.
+    """
+
+    version_field: Optional[str] = None
+    unversioned_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {}
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, fields: Optional[Iterable[str]] = None):
+        fields = set(fields) if fields is not None else None
+        deferred = self.get_deferred_fields()
+
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred or (fields is not None and not {field.name, field.attname} & fields):
+                continue
+
+            value = getattr(self, field.attname)
+
+            if hasattr(value, "resolve_expression"):
+                self._loaded_values.pop(field.attname, None)
+            else:
+                self._loaded_values[field.attname] = value
+
+    def dirty_fields(self) -> list[str]:
+        deferred = self.get_deferred_fields()
+        loaded = self.__dict__.get("_loaded_values", {})
+
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in deferred
+            and (field.attname not in loaded or loaded[field.attname] != getattr(self, field.attname))
+        ]
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        tracked = "_loaded_values" in self.__dict__ and not self._state.adding and not force_insert \
+            and using in (None, self._state.db)
+
+        if tracked and update_fields is None:
+            # Saving with an empty list of fields returns without querying the database
+            update_fields = self.dirty_fields()
+
+        if tracked and self.version_field is not None and set(update_fields) - {*self.unversioned_fields}:
+            expected = self._loaded_values.get(self.version_field, getattr(self, self.version_field))
+            setattr(self, self.version_field, expected + 1)
+            update_fields = [*(f for f in update_fields if f != self.version_field), self.version_field]
+            self._expected_version = expected
+
+        try:
+            super().save(force_insert=force_insert, force_update=force_update, using=using,
+                         update_fields=update_fields)
+        except ConcurrentUpdate:
+            setattr(self, self.version_field, self._loaded_values.get(self.version_field))
+            raise
+        finally:
+            self.__dict__.pop("_expected_version", None)
+
+        self.__dict__.setdefault("_loaded_values", {})
+        self._snapshot(update_fields)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self.__dict__.setdefault("_loaded_values", {})
+        self._snapshot(fields)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = self.__dict__.get("_expected_version")
+
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+        if not super()._do_update(base_qs.filter(**{self.version_field: expected}), using, pk_val, values,
+                                  update_fields, forced_update):
+            raise ConcurrentUpdate()
+
+        return True
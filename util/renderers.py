@@ -0,0 +1,26 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Allows views to negotiate Server-Sent Events. Views stream their events themselves, this renderer only renders
+    regular responses (e.g. errors) as a single event.
+    """
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    @staticmethod
+    def event(data, event_id=None) -> str:
+        prefix = f"id: {event_id}\n" if event_id is not None else ""
+        return f"{prefix}data: {json.dumps(data, cls=JSONEncoder)}\n\n"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return self.event(data).encode(self.charset)
@@ -0,0 +1,112 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+# Reads are only routed to replicas inside requests that explicitly allow it, everything else uses the primary
+_use_replicas = ContextVar("use_replicas", default=False)
+
+
+class ReplicaHealth:
+    """
+    Caches the health of every replica for `HEALTH_CHECK_SECONDS`, so that an unreachable replica is probed at most
+    once per period and reads fall back to the primary in the meantime.
+    """
+
+    def __init__(self):
+        self._state = {}  # type: dict[str, tuple[bool, float]]
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias: str) -> bool:
+        state = self._state.get(alias)
+
+        if state is None or time.monotonic() - state[1] > settings.REPLICA_ROUTING["HEALTH_CHECK_SECONDS"]:
+            state = (self.probe(alias), time.monotonic())
+
+            with self._lock:
+                self._state[alias] = state
+
+        return state[0]
+
+    @staticmethod
+    def probe(alias: str) -> bool:
+        connection = connections[alias]
+
+        try:
+            connection.ensure_connection()
+            return connection.is_usable()
+        except DatabaseError:
+            return False
+
+
+replica_health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    """
+    Routes reads of safe requests to a random healthy replica and all writes (as well as all reads of unsafe or sticky
+    requests) to the primary database.
+    """
+
+    @staticmethod
+    def db_for_read(model, **hints):
+        if not _use_replicas.get():
+            return DEFAULT_DB_ALIAS
+
+        # Instances are re-read from the database they were loaded from or saved to
+        if "instance" in hints:
+            return None
+
+        replicas = [alias for alias in settings.REPLICA_ROUTING["REPLICAS"] if replica_health.is_healthy(alias)]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    @staticmethod
+    def db_for_write(model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    @staticmethod
+    def allow_relation(obj1, obj2, **hints):
+        # The primary and its replicas hold the same data
+        return True
+
+    @staticmethod
+    def allow_migrate(db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db not in settings.REPLICA_ROUTING["REPLICAS"]
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Allows reads from replicas for safe requests. After a successful unsafe request, a cookie pins the client to the
+    primary for `STICKY_SECONDS`, so that clients always read their own writes despite replication lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.REPLICA_ROUTING
+        safe = request.method in SAFE_METHODS
+        token = _use_replicas.set(bool(config["REPLICAS"]) and safe and not self.is_sticky(request))
+
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replicas.reset(token)
+
+        if config["REPLICAS"] and not safe and response.status_code < 400:
+            response.set_cookie(key=config["STICKY_COOKIE"], value=str(time.time() + config["STICKY_SECONDS"]),
+                                max_age=config["STICKY_SECONDS"], secure=True, httponly=True, samesite="strict")
+
+        return response
+
+    @staticmethod
+    def is_sticky(request) -> bool:
+        try:
+            return float(request.COOKIES[settings.REPLICA_ROUTING["STICKY_COOKIE"]]) > time.time()
+        except (KeyError, ValueError):
+            return False
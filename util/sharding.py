@@ -0,0 +1,87 @@
+import bisect
+import hashlib
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+
+# Models whose rows are stored on the shard of the user they belong to
+SHARDED_MODELS = {"users.user", "authtoken.token"}
+
+
+def sharding_enabled() -> bool:
+    return bool(settings.SHARDING["SHARDS"])
+
+
+class HashRing:
+    """
+    Consistent hash ring over a list of database aliases. Every alias is placed on the ring `virtual_nodes` times, so
+    that adding or removing a shard only moves about 1/N of all keys.
+    """
+
+    def __init__(self, aliases: list[str], virtual_nodes: int):
+        points = sorted((self.hash(f"{alias}#{i}"), alias) for alias in aliases for i in range(virtual_nodes))
+        self.points = [point for point, _ in points]
+        self.aliases = [alias for _, alias in points]
+
+    @staticmethod
+    def hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def alias_for(self, key: str) -> str:
+        index = bisect.bisect(self.points, self.hash(key)) % len(self.points)
+        return self.aliases[index]
+
+
+@lru_cache(maxsize=None)
+def _ring(aliases: tuple[str, ...], virtual_nodes: int) -> HashRing:
+    return HashRing(list(aliases), virtual_nodes)
+
+
+def shard_for(user_id: uuid.UUID) -> str:
+    """
+    Return the shard a user with the given ID belongs to according to the current configuration. Where a user is
+    actually stored is recorded in the user directory, as both differ until `rebalance_shards` has been run.
+    """
+    ring = _ring(tuple(settings.SHARDING["SHARDS"]), settings.SHARDING["VIRTUAL_NODES"])
+    return ring.alias_for(str(user_id))
+
+
+class ShardRouter:
+    """
+    Routes users and their tokens to the shard they are stored on. This is only possible with an instance hint (e.g.
+    when saving, refreshing or following a relation), lookups by other fields have to go through
+    `User.objects.locate()`. Every other model is left to the following routers.
+    """
+
+    @staticmethod
+    def db_for_instance(model, **hints):
+        if not sharding_enabled() or model._meta.label_lower not in SHARDED_MODELS:
+            return None
+
+        instance = hints.get("instance")
+
+        if instance is None:
+            return None
+
+        if instance._meta.label_lower in SHARDED_MODELS and instance._state.db is not None:
+            return instance._state.db
+
+        from users.models import User, UserDirectory
+
+        if isinstance(instance, User):
+            return shard_for(instance.pk)
+
+        # Related rows (tokens, verifications) are located through the user they belong to
+        user_id = getattr(instance, "user_id", None)
+        return UserDirectory.shard_of(user_id) if user_id is not None else None
+
+    db_for_read = db_for_instance
+    db_for_write = db_for_instance
+
+    @staticmethod
+    def allow_relation(obj1, obj2, **hints):
+        if sharding_enabled() and {obj1._meta.label_lower, obj2._meta.label_lower} & SHARDED_MODELS:
+            return True
+
+        return None
@@ -0,0 +1,17 @@
+from rest_framework import throttling
+
+from monitoring.metrics import throttled_requests
+
+
+class MetricsThrottleMixin:
+    def throttle_failure(self):
+        throttled_requests.inc(self.scope)
+        return super().throttle_failure()
+
+
+class UserRateThrottle(MetricsThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class AnonRateThrottle(MetricsThrottleMixin, throttling.AnonRateThrottle):
+    pass
@@ -0,0 +1,380 @@
+import json
+import re
+from functools import lru_cache
+from typing import Callable, Optional
+
+import yaml
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.status import HTTP_400_BAD_REQUEST
+
+# A validator returns None for valid values and errors in the shape of DRF's serializer errors otherwise
+Validator = Callable[[object], Optional[object]]
+
+MESSAGES = {
+    "required": serializers.Field.default_error_messages["required"],
+    "null": serializers.Field.default_error_messages["null"],
+    "object": serializers.Serializer.default_error_messages["invalid"],
+    "array": serializers.ListField.default_error_messages["not_a_list"],
+    "email": serializers.EmailField.default_error_messages["invalid"],
+    "enum": serializers.ChoiceField.default_error_messages["invalid_choice"],
+    "minimum": serializers.IntegerField.default_error_messages["min_value"],
+    "maximum": serializers.IntegerField.default_error_messages["max_value"],
+    "minItems": serializers.ListField.default_error_messages["min_length"],
+    "maxItems": serializers.ListField.default_error_messages["max_length"],
+    "oneOf": "Invalid data. Expected exactly one of the allowed request bodies.",
+}
+
+
+# Schema type expected for the fields of each class. Subclasses are matched by the first class they derive from, so
+# more specific classes come first.
+FIELD_TYPES = (
+    (serializers.BooleanField, "boolean"),
+    (serializers.IntegerField, "integer"),
+    ((serializers.FloatField, serializers.DecimalField), "number"),
+    ((serializers.ListField, serializers.ListSerializer, serializers.MultipleChoiceField), "array"),
+    (serializers.Serializer, "object"),
+    ((serializers.CharField, serializers.ChoiceField, serializers.UUIDField, serializers.DateField,
+      serializers.DateTimeField), "string"),
+)
+
+
+def message(key: str, **kwargs) -> str:
+    return str(MESSAGES[key]).format(**kwargs)
+
+
+def field_type(field: serializers.Field) -> Optional[str]:
+    return next((schema_type for classes, schema_type in FIELD_TYPES if isinstance(field, classes)), None)
+
+
+def coerce_with(field: serializers.Field) -> Callable[[object], tuple[object, Optional[list]]]:
+    """
+    Return a function converting a value the way the given DRF field does, so that the compiled validators accept
+    exactly the values the serializers accept, e.g. numeric strings for integers. It returns the converted value and
+    None, or None and the errors of the field.
+    """
+    def coerce(value):
+        try:
+            return field.to_internal_value(value), None
+        except serializers.ValidationError as exc:
+            return None, exc.detail
+
+    return coerce
+
+
+class SchemaCompiler:
+    """
+    Compiles the JSON schemas of an OpenAPI document into plain Python closures. References and `allOf` compositions
+    are resolved once at compile time, so validating a value only walks the closures.
+    """
+
+    def __init__(self, document: dict):
+        self.document = document
+
+    def resolve(self, schema: dict) -> dict:
+        while "$ref" in schema:
+            node = self.document
+
+            for key in schema["$ref"].lstrip("#/").split("/"):
+                node = node[key]
+
+            schema = node
+
+        if "allOf" in schema:
+            merged = {"type": "object", "properties": {}, "required": []}
+
+            for part in map(self.resolve, schema["allOf"]):
+                merged["properties"].update(part.get("properties", {}))
+                merged["required"] += part.get("required", [])
+
+            schema = merged
+
+        return schema
+
+    def properties(self, schema: dict) -> tuple[dict, set[str]]:
+        """
+        Return all properties and the required properties of an object schema. For `oneOf` compositions, only
+        properties required by every alternative are required.
+        """
+        schema = self.resolve(schema)
+
+        if "oneOf" in schema:
+            alternatives = [self.properties(s) for s in schema["oneOf"]]
+            properties = {k: v for p, _ in alternatives for k, v in p.items()}
+            return properties, set.intersection(*(r for _, r in alternatives))
+
+        return schema.get("properties", {}), set(schema.get("required", []))
+
+    def compile(self, schema: dict) -> Validator:
+        schema = self.resolve(schema)
+
+        if "oneOf" in schema:
+            validator = self.compile_one_of(schema)
+        else:
+            compiler = getattr(self, f"compile_{schema.get('type')}", None)
+            validator = compiler(schema) if compiler is not None else None
+
+        if validator is None:
+            return lambda value: None
+
+        if schema.get("nullable", False):
+            return lambda value: None if value is None else validator(value)
+
+        return lambda value: [message("null")] if value is None else validator(value)
+
+    def compile_one_of(self, schema: dict) -> Validator:
+        alternatives = [(self.properties(s)[1], self.compile(s)) for s in schema["oneOf"]]
+
+        def validate(value):
+            errors = [validator(value) for _, validator in alternatives]
+
+            if errors.count(None) == 1:
+                return None
+
+            # Report the errors of the alternative the body was evidently meant for, if there is exactly one
+            if errors.count(None) == 0 and isinstance(value, dict):
+                intended = [e for (required, _), e in zip(alternatives, errors)
+                            if required and required <= value.keys()]
+
+                if len(intended) == 1:
+                    return intended[0]
+
+            return {api_settings.NON_FIELD_ERRORS_KEY: [message("oneOf")]}
+
+        return validate
+
+    def compile_object(self, schema: dict) -> Validator:
+        properties = {name: self.compile(s) for name, s in schema.get("properties", {}).items()}
+        required = schema.get("required", [])
+
+        def validate(value):
+            if not isinstance(value, dict):
+                return {api_settings.NON_FIELD_ERRORS_KEY: [message("object", datatype=type(value).__name__)]}
+
+            errors = {name: [message("required")] for name in required if name not in value}
+
+            for name, validator in properties.items():
+                if name in value and name not in errors:
+                    error = validator(value[name])
+
+                    if error is not None:
+                        errors[name] = error
+
+            return errors or None
+
+        return validate
+
+    @staticmethod
+    def compile_string(schema: dict) -> Validator:
+        coerce = coerce_with(serializers.UUIDField() if schema.get("format") == "uuid" else serializers.CharField())
+        # Choices are compared as strings, like ChoiceField does
+        choices = {str(choice) for choice in schema["enum"]} if "enum" in schema else None
+        email = schema.get("format") == "email"
+
+        def validate(value):
+            value, errors = coerce(value)
+
+            if errors is not None:
+                return errors
+
+            if choices is not None and str(value) not in choices:
+                return [message("enum", input=value)]
+
+            if email:
+                try:
+                    validate_email(value)
+                except DjangoValidationError:
+                    return [message("email")]
+
+            return None
+
+        return validate
+
+    @staticmethod
+    def compile_number(schema: dict, field: serializers.Field = None) -> Validator:
+        coerce = coerce_with(field or serializers.FloatField())
+        minimum = schema.get("minimum")
+        maximum = schema.get("maximum")
+
+        def validate(value):
+            value, errors = coerce(value)
+
+            if errors is not None:
+                return errors
+
+            if minimum is not None and value < minimum:
+                return [message("minimum", min_value=minimum)]
+
+            if maximum is not None and value > maximum:
+                return [message("maximum", max_value=maximum)]
+
+            return None
+
+        return validate
+
+    def compile_integer(self, schema: dict) -> Validator:
+        return self.compile_number(schema, serializers.IntegerField())
+
+    @staticmethod
+    def compile_boolean(schema: dict) -> Validator:
+        coerce = coerce_with(serializers.BooleanField())
+        return lambda value: coerce(value)[1]
+
+    def compile_array(self, schema: dict) -> Validator:
+        items = self.compile(schema.get("items", {}))
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+
+        def validate(value):
+            if not isinstance(value, list):
+                return [message("array", input_type=type(value).__name__)]
+
+            if min_items is not None and len(value) < min_items:
+                return [message("minItems", min_length=min_items)]
+
+            if max_items is not None and len(value) > max_items:
+                return [message("maxItems", max_length=max_items)]
+
+            errors = {index: error for index, error in enumerate(map(items, value)) if error is not None}
+            return errors or None
+
+        return validate
+
+
+@lru_cache(maxsize=None)
+def load_document() -> dict:
+    # The C loader is considerably faster, but only available if PyYAML was built against libyaml
+    with open(settings.REQUEST_VALIDATION["SCHEMA"]) as file:
+        return yaml.load(file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def request_body_schema(document: dict, method: str, path: str) -> Optional[dict]:
+    operation = document["paths"].get(path, {}).get(method.lower(), {})
+    return operation.get("requestBody", {}).get("content", {}).get("application/json", {}).get("schema")
+
+
+def compile_request_validators(document: dict) -> tuple[dict, list]:
+    """
+    Compile the JSON request body schemas of all operations. Returns validators of paths without parameters by method
+    and path, as well as validators of paths with parameters as list of method, path pattern and validator.
+    """
+    compiler = SchemaCompiler(document)
+    static, dynamic = {}, []
+
+    for path, operations in document["paths"].items():
+        for method in operations:
+            schema = request_body_schema(document, method, path)
+
+            if schema is None:
+                continue
+
+            validator = compiler.compile(schema)
+
+            if "{" in path:
+                segments = ["[^/]+" if s.startswith("{") else re.escape(s) for s in path.split("/")]
+                pattern = re.compile("^" + "/".join(segments) + "$")
+                dynamic.append((method.upper(), pattern, validator))
+            else:
+                static[(method.upper(), path)] = validator
+
+    return static, dynamic
+
+
+class RequestValidationMiddleware:
+    """
+    Validates JSON request bodies against the schemas of docs/openapi.yml, compiled once at start-up. Malformed bodies
+    are rejected before any serializer is constructed and before authentication, with errors in the shape of DRF's.
+    Valid bodies are still validated by the serializers, which remain the source of truth.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.static, self.dynamic = compile_request_validators(load_document())
+
+    def __call__(self, request):
+        validator = self.validator(request.method, request.path_info)
+
+        if validator is not None and request.content_type == "application/json":
+            try:
+                data = json.loads(request.body) if request.body else {}
+            except ValueError as exc:
+                return JsonResponse({"detail": f"JSON parse error - {exc}"}, status=HTTP_400_BAD_REQUEST)
+
+            errors = validator(data)
+
+            if errors is not None:
+                return JsonResponse(errors, status=HTTP_400_BAD_REQUEST)
+
+        return self.get_response(request)
+
+    def validator(self, method: str, path: str) -> Optional[Validator]:
+        validator = self.static.get((method, path))
+
+        if validator is None and self.dynamic:
+            validator = next((v for m, p, v in self.dynamic if m == method and p.match(path)), None)
+
+        return validator
+
+
+@checks.register()
+def check_request_schemas(app_configs, **kwargs):
+    """
+    Fail if the request body schemas of docs/openapi.yml drift apart from the serializers validating the same bodies:
+    both must describe the same fields of the same types, and the schema may neither require a field the serializer
+    does not require, nor reject null where the serializer accepts it.
+    """
+    document = load_document()
+    compiler = SchemaCompiler(document)
+    errors = []
+
+    for operation, serializer_path in settings.REQUEST_VALIDATION["SERIALIZERS"].items():
+        method, path = operation.split(" ", 1)
+        schema = request_body_schema(document, method, path)
+
+        if schema is None:
+            errors.append(checks.Error(f"No JSON request body documented for {operation}", id="util.E001"))
+            continue
+
+        serializer_class = import_string(serializer_path)
+        # Avoids running __init__, as some serializers access the database there
+        all_fields = serializer_class.get_fields(serializer_class.__new__(serializer_class))
+        fields = {
+            name: field for name, field in all_fields.items()
+            if not field.read_only and not isinstance(field, serializers.HiddenField)
+        }
+        properties, required = compiler.properties(schema)
+        hint = f"Update docs/openapi.yml or {serializer_path}"
+
+        if set(properties) != set(fields):
+            errors.append(checks.Error(
+                f"Request body of {operation} documents {sorted(properties)}, "
+                f"but {serializer_class.__name__} accepts {sorted(fields)}", hint=hint, id="util.E002"))
+            continue
+
+        for name, field in sorted(fields.items()):
+            expected = field_type(field)
+            documented = compiler.resolve(properties[name]).get("type")
+
+            if expected is not None and documented is not None and documented != expected:
+                errors.append(checks.Error(f"Request body of {operation} documents '{name}' as {documented}, "
+                                           f"but {serializer_class.__name__} expects {expected}", hint=hint,
+                                           id="util.E005"))
+
+        for name in sorted(required - {name for name, field in fields.items() if field.required}):
+            errors.append(checks.Error(f"Request body of {operation} requires '{name}', "
+                                       f"but {serializer_class.__name__} does not", hint=hint, id="util.E003"))
+
+        if "oneOf" not in compiler.resolve(schema):
+            for name, field in sorted(fields.items()):
+                if field.allow_null and not compiler.resolve(properties[name]).get("nullable", False):
+                    errors.append(checks.Error(f"Request body of {operation} rejects null for '{name}', "
+                                               f"but {serializer_class.__name__} accepts it", hint=hint,
+                                               id="util.E004"))
+
+    return errors
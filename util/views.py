@@ -0,0 +1,4 @@
+def qualified_view_name(view_func) -> str:
+    # Class-based views (and DRF's @api_view wrappers) expose their class through `view_class`
+    view = getattr(view_func, "view_class", view_func)
+    return f"{view.__module__}.{view.__name__}"
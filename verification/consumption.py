@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from django.db import transaction
+from rest_framework import serializers
+
+from verification.models import Verification
+
+TYPE_NAMES = {"email": "an email", "phone_number": "a phone", "username": "a username"}
+
+
+class VerificationSecretMixin:
+    """
+    Serializer mixin for flows completed with the secret of a confirmed verification. `validate_secret` loads the
+    verification in a single query and keeps it for `consume`, which claims and deletes it with a single conditional
+    DELETE in the transaction the flow applies its change in. A secret is therefore consumed exactly once, even by
+    concurrent requests, and stays valid if the change fails.
+
+    Flows set `verification_type` to require a type of verification and `authenticated_verification` to require a
+    verification of the requesting user (True) or an anonymous one (False).
+    """
+
+    verification_type: Optional[str] = None
+    authenticated_verification: bool = False
+
+    def validate_secret(self, value):
+        # Outdated verifications are filtered instead of deleted, which saves a query per request
+        verification = Verification.objects.filter(secret=value, created__gt=Verification.oldest_allowed()).first()
+
+        if verification is None:
+            raise serializers.ValidationError("Invalid secret")
+
+        if self.verification_type is not None and verification.type() != self.verification_type:
+            raise serializers.ValidationError(f"Secret must be from {TYPE_NAMES[self.verification_type]} verification")
+
+        if self.authenticated_verification and not verification.is_authenticated():
+            raise serializers.ValidationError("Secret must be from an authenticated verification")
+
+        if not self.authenticated_verification and verification.is_authenticated():
+            raise serializers.ValidationError("Secret must be from an unauthenticated verification")
+
+        # Compares the IDs, so that the user of the verification is not loaded
+        if self.authenticated_verification and verification.user_id != self.context["request"].user.pk:
+            raise serializers.ValidationError("User mismatch")
+
+        self.validate_verification(verification)
+        self.verification = verification
+        return value
+
+    def validate_verification(self, verification: Verification):
+        """
+        Hook for further checks of the verification, raising a `ValidationError` if it cannot be used.
+        """
+
+    @contextmanager
+    def consume(self) -> Iterator[Verification]:
+        """
+        Delete the validated verification and open a transaction for the flow's change. Raises a `ValidationError` if
+        the verification has already been consumed by another request. If the change fails, the deletion is rolled
+        back as well.
+        """
+        with transaction.atomic():
+            deleted, _ = Verification.objects.filter(pk=self.verification.pk, secret=self.verification.secret).delete()
+
+            if not deleted:
+                raise serializers.ValidationError({"secret": ["Invalid secret"]})
+
+            yield self.verification
@@ -26,7 +26,8 @@ class Verification(models.Model):
     email = models.EmailField(null=True, default=None)
     phone_number = PhoneNumberField(null=True, default=None)
     username = models.CharField(max_length=150, null=True, default=None)
-    user = models.ForeignKey(to=User, on_delete=models.CASCADE, null=True, default=None)
+    # Without constraint, as users may be stored on another shard than their verifications
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE, null=True, default=None, db_constraint=False)
     token = models.PositiveIntegerField(default=verification_token)
     secret = models.UUIDField(unique=True, null=True, default=None)
     created = models.DateTimeField(auto_now_add=True)
@@ -45,11 +46,13 @@ class Verification(models.Model):
                                    name="not_both_email_and_username"),
         ]
 
+    @classmethod
+    def oldest_allowed(cls):
+        return timezone.now() - timedelta(minutes=cls.VALIDITY_PERIOD_MINUTES)
+
     @classmethod
     def clear_outdated(cls):
-        current_timestamp = timezone.now()
-        oldest_allowed = current_timestamp - timedelta(minutes=cls.VALIDITY_PERIOD_MINUTES)
-        cls.objects.filter(created__lte=oldest_allowed).delete()
+        cls.objects.filter(created__lte=cls.oldest_allowed()).delete()
 
     def is_email(self) -> bool:
         return self.email is not None
@@ -60,5 +63,11 @@ class Verification(models.Model):
     def is_username(self) -> bool:
         return self.username is not None
 
+    def type(self) -> str:
+        if self.is_email():
+            return "email"
+
+        return "phone_number" if self.is_phone_number() else "username"
+
     def is_authenticated(self) -> bool:
-        return self.user is not None
+        return self.user_id is not None
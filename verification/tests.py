@@ -1,3 +1,60 @@
+import uuid
+
 from django.test import TestCase
+from rest_framework import serializers
+
+from verification.consumption import VerificationSecretMixin
+from verification.models import Verification
+
+
+class SecretSerializer(VerificationSecretMixin, serializers.Serializer):
+    secret = serializers.UUIDField()
+
+
+class VerificationSecretMixinTests(TestCase):
+    def setUp(self):
+        self.verification = Verification.objects.create(email="alice@example.com", secret=uuid.uuid4())
+
+    def validated(self) -> SecretSerializer:
+        serializer = SecretSerializer(data={"secret": str(self.verification.secret)})
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def test_consume_deletes_verification(self):
+        with self.validated().consume() as verification:
+            self.assertEqual(verification.pk, self.verification.pk)
+
+        self.assertFalse(Verification.objects.filter(pk=self.verification.pk).exists())
+
+    def test_second_consume_of_same_secret_fails(self):
+        # Both requests validate the secret before either of them consumes it
+        first, second = self.validated(), self.validated()
+
+        with first.consume():
+            pass
+
+        with self.assertRaises(serializers.ValidationError):
+            with second.consume():
+                self.fail("The change of the second request must not be applied")
+
+    def test_consumed_secret_fails_validation(self):
+        with self.validated().consume():
+            pass
+
+        serializer = SecretSerializer(data={"secret": str(self.verification.secret)})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("secret", serializer.errors)
+
+    def test_failed_change_rolls_deletion_back(self):
+        serializer = self.validated()
+
+        with self.assertRaises(RuntimeError):
+            with serializer.consume():
+                raise RuntimeError("Change failed")
+
+        self.assertTrue(Verification.objects.filter(pk=self.verification.pk).exists())
+
+        with serializer.consume():
+            pass
 
-# Create your tests here.
+        self.assertFalse(Verification.objects.filter(pk=self.verification.pk).exists())
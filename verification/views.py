@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.status import HTTP_403_FORBIDDEN
 
+from monitoring.metrics import verifications_created, verifications_confirmed
 from util.response import StatusResponse
 from verification.models import Verification
 from verification.serializers import VerificationRequestSerializer, VerificationConfirmSerializer
@@ -16,6 +17,7 @@ def verification_request(request):
     serializer = VerificationRequestSerializer(data=request.data, context={"request": request})
     serializer.is_valid(raise_exception=True)
     serializer.save()
+    verifications_created.inc(serializer.instance.type())
 
     return Response({"verification": serializer.instance.id})
 
@@ -31,14 +33,18 @@ def verification_confirm(request):
     try:
         verification = Verification.objects.get(id=serializer.validated_data["verification"])
     except Verification.DoesNotExist:
+        verifications_confirmed.inc("unknown")
         return fail_response
 
     if verification.token != serializer.validated_data["token"]:
+        verifications_confirmed.inc("wrong_token")
         return fail_response
 
     if verification.secret is not None:
+        verifications_confirmed.inc("already_confirmed")
         return fail_response
 
     verification.secret = uuid.uuid4()
     verification.save()
+    verifications_confirmed.inc("confirmed")
     return Response({"secret": verification.secret})